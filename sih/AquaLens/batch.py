@@ -0,0 +1,75 @@
+"""Headless batch processing entry point for AquaLens.
+
+Examples:
+    python batch.py images /data/cruise42 --recursive --location "Station 7"
+    python batch.py database --sample 12 --sample 13 --replace
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from core.batch import BatchRunner, iter_directory, iter_stored_images
+from core.settings import SETTINGS_FILE, configure_logging, load_settings
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the AquaLens processing pipeline without the GUI.")
+    parser.add_argument("--settings", type=Path, default=SETTINGS_FILE, help="settings YAML file")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--preset", default=None, help="capture preset whose flat-field model to apply")
+    parser.add_argument("--gate", action="store_true", help="reject blurry and near-duplicate images")
+    parser.add_argument("--commit-every", type=int, default=64, help="images per database transaction")
+    sources = parser.add_subparsers(dest="source", required=True)
+
+    images = sources.add_parser("images", help="process a directory of image files")
+    images.add_argument("directory", type=Path)
+    images.add_argument("--recursive", action="store_true")
+    images.add_argument("--store-images", action="store_true", help="store preprocessed JPEGs in the database")
+    for name in ("magnification", "depth", "operator", "location", "notes"):
+        images.add_argument(f"--{name}", default=None, help=f"sample {name}")
+
+    stored = sources.add_parser(
+        "database", help="re-run detection on images already stored in the database (stored pixels are already preprocessed)"
+    )
+    stored.add_argument("--sample", type=int, action="append", dest="samples", help="restrict to sample id (repeatable)")
+    stored.add_argument("--replace", action="store_true", help="delete earlier detections of each image first")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    settings = load_settings(args.settings)
+    runner = BatchRunner(
+        settings,
+        workers=args.workers,
+        gate=args.gate,
+        store_images=getattr(args, "store_images", False),
+        replace=getattr(args, "replace", False),
+        preset=args.preset,
+        commit_every=args.commit_every,
+    )
+    if args.source == "images":
+        if not args.directory.is_dir():
+            logging.error("%s is not a directory", args.directory)
+            return 2
+        items = iter_directory(args.directory, recursive=args.recursive)
+        metadata = {
+            name: getattr(args, name)
+            for name in ("magnification", "depth", "operator", "location", "notes")
+            if getattr(args, name) is not None
+        }
+        metadata.setdefault("notes", f"batch: {args.directory}")
+        summary = runner.run(items, sample_metadata=metadata)
+    else:
+        summary = runner.run(iter_stored_images(runner.database, args.samples))
+    print(summary.format())
+    return 1 if summary.failed and not summary.processed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
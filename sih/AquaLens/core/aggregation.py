@@ -0,0 +1,111 @@
+"""Streaming per-species statistics across the frames of a sample session."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+from core.detections import Detections
+
+
+class SpeciesAggregator:
+    """Running counts, confidence mean/variance and histograms per species.
+
+    Each `update` folds one frame's detections in with bincounts over the
+    species ids and merges the per-frame moments into the running ones
+    (Chan et al. parallel variance), so its cost depends only on the new
+    frame. `summary` is O(species), independent of session length.
+    """
+
+    def __init__(self, bins: int = 10, names: Sequence[str] = ()):
+        self.bins = max(1, int(bins))
+        self._lock = threading.Lock()
+        self.names = tuple(names)
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new sample session."""
+        with self._lock:
+            self.frames = 0
+            self._counts = np.zeros(0, dtype=np.int64)
+            self._means = np.zeros(0, dtype=np.float64)
+            self._m2 = np.zeros(0, dtype=np.float64)
+            self._histogram = np.zeros((0, self.bins), dtype=np.int64)
+            self._total = 0
+            self._total_mean = 0.0
+            self._total_m2 = 0.0
+
+    def _grow(self, size: int) -> None:
+        extra = size - len(self._counts)
+        if extra <= 0:
+            return
+        self._counts = np.concatenate([self._counts, np.zeros(extra, dtype=np.int64)])
+        self._means = np.concatenate([self._means, np.zeros(extra)])
+        self._m2 = np.concatenate([self._m2, np.zeros(extra)])
+        self._histogram = np.concatenate([self._histogram, np.zeros((extra, self.bins), dtype=np.int64)])
+
+    def update(self, detections: Detections) -> None:
+        """Fold one frame's detections into the session statistics."""
+        ids = detections.class_ids
+        scores = detections.scores.astype(np.float64)
+        with self._lock:
+            self.frames += 1
+            if len(detections.names) > len(self.names):
+                self.names = detections.names
+            if not len(ids):
+                return
+            size = int(ids.max()) + 1
+            self._grow(size)
+            counts = np.bincount(ids, minlength=size)
+            means = np.bincount(ids, weights=scores, minlength=size) / np.maximum(counts, 1)
+            m2 = np.bincount(ids, weights=(scores - means[ids]) ** 2, minlength=size)
+            present = np.flatnonzero(counts)
+            n_a, n_b = self._counts[present], counts[present]
+            total = n_a + n_b
+            delta = means[present] - self._means[present]
+            self._means[present] += delta * n_b / total
+            self._m2[present] += m2[present] + delta * delta * n_a * n_b / total
+            self._counts[present] = total
+            bin_idx = np.clip((scores * self.bins).astype(np.int64), 0, self.bins - 1)
+            self._histogram[:size] += np.bincount(ids * self.bins + bin_idx, minlength=size * self.bins).reshape(
+                size, self.bins
+            )
+
+            frame_count = len(scores)
+            frame_mean = float(scores.mean())
+            frame_m2 = float(((scores - frame_mean) ** 2).sum())
+            combined = self._total + frame_count
+            delta_total = frame_mean - self._total_mean
+            self._total_mean += delta_total * frame_count / combined
+            self._total_m2 += frame_m2 + delta_total * delta_total * self._total * frame_count / combined
+            self._total = combined
+
+    def _name(self, class_id: int) -> str:
+        return self.names[class_id] if class_id < len(self.names) else f"class_{class_id}"
+
+    def summary(self) -> Dict[str, Any]:
+        """Session totals plus per-species count, mean/std confidence and histogram."""
+        with self._lock:
+            present = np.flatnonzero(self._counts).tolist()
+            species = {
+                self._name(idx): {
+                    "count": int(self._counts[idx]),
+                    "mean_confidence": float(self._means[idx]),
+                    "std_confidence": float(np.sqrt(self._m2[idx] / self._counts[idx])),
+                    "histogram": self._histogram[idx].tolist(),
+                }
+                for idx in present
+            }
+            counts = {name: stats["count"] for name, stats in species.items()}
+            return {
+                "frames": self.frames,
+                "total": self._total,
+                "mean_confidence": self._total_mean if self._total else None,
+                "std_confidence": float(np.sqrt(self._total_m2 / self._total)) if self._total else None,
+                "counts": counts,
+                "dominant": max(counts, key=counts.get) if counts else None,
+                "species": species,
+                "histogram_bins": self.bins,
+            }
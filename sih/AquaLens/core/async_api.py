@@ -0,0 +1,128 @@
+"""Asyncio facade over PipelineManager for headless and service use."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from core.frame import Frame
+from core.manager import PipelineManager
+
+_END = object()
+
+
+class AsyncPipeline:
+    """Awaitable capture, processing and persistence for one PipelineManager.
+
+    Blocking camera/inference work runs on a single-thread executor and
+    SQLite writes on another, so one event loop can drive several pipelines
+    with two threads each instead of a thread per request. A single
+    processing thread also serialises access to the manager's stateful
+    stages. Timeouts and cancellation stop the awaiting coroutine; work
+    already running in the executor finishes in the background before the
+    next call starts.
+    """
+
+    def __init__(self, manager: PipelineManager, timeout: Optional[float] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.manager = manager
+        self.timeout = timeout
+        self._process_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AsyncPipeline-process")
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AsyncPipeline-db")
+
+    async def _run(self, executor: ThreadPoolExecutor, func: Callable[..., Any], *args, timeout: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(executor, func, *args)
+        return await asyncio.wait_for(future, timeout if timeout is not None else self.timeout)
+
+    async def capture_and_process(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Capture one frame and run it through the pipeline."""
+        return await self._run(self._process_executor, self.manager.capture_and_process, timeout=timeout)
+
+    async def process_frame(self, frame: Frame, gate: bool = True, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self._run(self._process_executor, self.manager.process_frame, frame, gate, timeout=timeout)
+
+    async def save_results(
+        self, sample_metadata: Dict[str, Any], results: Dict[str, Any], timeout: Optional[float] = None
+    ) -> None:
+        """Persist a result; shielded so a timeout or cancellation never leaves a half-written sample behind."""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._db_executor, self.manager.save_results, sample_metadata, results)
+        await asyncio.wait_for(asyncio.shield(future), timeout if timeout is not None else self.timeout)
+
+    async def stream(
+        self,
+        interval: Optional[float] = None,
+        count: Optional[int] = None,
+        duration: Optional[float] = None,
+        max_pending: int = 2,
+        sample_metadata: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield time-lapse results as they are produced.
+
+        At most `max_pending` results wait for the consumer; the capture
+        thread blocks beyond that. Breaking out of the loop, cancelling the
+        consuming task or calling `aclose()` stops the capture run.
+        """
+        loop = asyncio.get_running_loop()
+        results: asyncio.Queue = asyncio.Queue(maxsize=max(1, int(max_pending)))
+        stop_event = threading.Event()
+
+        def deliver(item: Any) -> None:
+            asyncio.run_coroutine_threadsafe(results.put(item), loop).result()
+
+        def produce() -> None:
+            run = self.manager.run_timelapse(
+                interval, count=count, duration=duration, stop_event=stop_event, sample_metadata=sample_metadata
+            )
+            try:
+                with contextlib.closing(run):
+                    for result in run:
+                        if stop_event.is_set():
+                            break
+                        deliver(result)
+            except Exception as exc:
+                self.logger.exception("Frame stream failed")
+                deliver(exc)
+            finally:
+                deliver(_END)
+
+        producer = loop.run_in_executor(self._process_executor, produce)
+        try:
+            while True:
+                item = await results.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop_event.set()
+            # Drain so the producer can deliver its end marker and release the executor.
+            while not producer.done():
+                try:
+                    if await asyncio.wait_for(results.get(), 0.1) is _END:
+                        break
+                except asyncio.TimeoutError:
+                    continue
+
+    async def aclose(self) -> None:
+        """Wait for outstanding work and stop the executor threads."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._process_executor.shutdown)
+        await loop.run_in_executor(None, self._db_executor.shutdown)
+
+    async def shutdown(self) -> None:
+        """Close the facade and shut the underlying manager down."""
+        await self.aclose()
+        await asyncio.get_running_loop().run_in_executor(None, self.manager.shutdown)
+
+    async def __aenter__(self) -> "AsyncPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
@@ -0,0 +1,295 @@
+"""Camera backends used by CameraManager.
+
+Each backend delivers RGB uint8 frames as NumPy arrays. Hardware backends
+wrap Picamera2 and OpenCV; replay and synthetic backends provide repeatable
+input for load tests on machines without a microscope camera.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    from picamera2 import Picamera2  # type: ignore
+except ImportError:
+    Picamera2 = None
+
+from PIL import Image
+
+BufferProvider = Callable[[Tuple[int, ...]], np.ndarray]
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+
+
+def _allocate(shape: Tuple[int, ...]) -> np.ndarray:
+    return np.empty(shape, dtype=np.uint8)
+
+
+class CameraBackend:
+    """Base class for frame sources."""
+
+    name = "base"
+    # Live hardware paces itself; file/synthetic sources are throttled to the configured fps.
+    live = False
+
+    def __init__(self, resolution: Tuple[int, int], acquire_buffer: Optional[BufferProvider] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.resolution = tuple(resolution)
+        self.acquire_buffer = acquire_buffer or _allocate
+        # Sensor metadata (exposure, gain) for the most recent frame, when the backend reports it.
+        self.last_metadata: Dict[str, Any] = {}
+
+    def start(self) -> None:
+        """Start streaming; no-op for sources that need no warm-up."""
+
+    def read(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources held by the backend."""
+
+    def _fit(self, array: np.ndarray) -> np.ndarray:
+        """Resize an RGB array to the configured resolution into a pooled buffer."""
+        width, height = self.resolution
+        buffer = self.acquire_buffer((height, width, 3))
+        if array.shape[:2] == (height, width):
+            np.copyto(buffer, array)
+        elif cv2 is not None:
+            cv2.resize(array, (width, height), dst=buffer, interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(buffer, np.asarray(Image.fromarray(array).resize((width, height))))
+        return buffer
+
+
+class Picamera2Backend(CameraBackend):
+    name = "picamera2"
+    live = True
+
+    def __init__(self, resolution, acquire_buffer=None):
+        super().__init__(resolution, acquire_buffer)
+        self._camera = Picamera2()
+        config = self._camera.create_preview_configuration(main={"size": self.resolution})
+        self._camera.configure(config)
+        self._started = False
+        self.logger.info("Picamera2 initialized")
+
+    def start(self) -> None:
+        if not self._started:
+            self._camera.start()
+            self._started = True
+
+    def read(self) -> Optional[np.ndarray]:
+        self.start()
+        request = self._camera.capture_request()
+        try:
+            frame = request.make_array("main")
+            self.last_metadata = request.get_metadata() or {}
+        finally:
+            request.release()
+        if frame is None:
+            self.logger.error("Picamera2 returned no frame")
+            return None
+        # XBGR8888 arrives as [R, G, B, X]; drop the padding channel as a view.
+        return frame[..., :3] if frame.ndim == 3 and frame.shape[2] == 4 else frame
+
+    def close(self) -> None:
+        if self._started:
+            self._camera.stop()
+        self._camera.close()
+
+
+class OpenCVBackend(CameraBackend):
+    name = "opencv"
+    live = True
+
+    def __init__(self, resolution, acquire_buffer=None, device: int = 0):
+        super().__init__(resolution, acquire_buffer)
+        self._capture_device = cv2.VideoCapture(device)
+        if not self._capture_device.isOpened():
+            raise RuntimeError(f"Unable to open CV2 capture device {device}")
+        self._capture_device.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+        self._capture_device.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+        # Keep the driver queue short so reads return fresh frames.
+        self._capture_device.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.logger.info("OpenCV capture initialized")
+
+    def read(self) -> Optional[np.ndarray]:
+        buffer = self.acquire_buffer((self.resolution[1], self.resolution[0], 3))
+        ret, frame = self._capture_device.read(buffer)
+        if not ret:
+            self.logger.error("OpenCV failed to read frame")
+            return None
+        if frame is not buffer:
+            # Device ignored the requested size; adopt its native shape for the pool.
+            self.resolution = (frame.shape[1], frame.shape[0])
+        # No sensor metadata: CAP_PROP_EXPOSURE/GAIN units are driver specific (V4L2 and DirectShow
+        # report log2 seconds), not Picamera2's ExposureTime (µs) / AnalogueGain, so they are left out.
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+        return frame
+
+    def close(self) -> None:
+        self._capture_device.release()
+
+
+class PlaceholderBackend(CameraBackend):
+    """Solid-colour frames used when no camera is available."""
+
+    name = "placeholder"
+
+    def read(self) -> Optional[np.ndarray]:
+        buffer = self.acquire_buffer((self.resolution[1], self.resolution[0], 3))
+        buffer[...] = (0, 92, 128)
+        return buffer
+
+
+class ReplayBackend(CameraBackend):
+    """Replay a directory of images or a video file, optionally looping."""
+
+    name = "replay"
+
+    def __init__(self, resolution, acquire_buffer=None, source: Optional[str] = None, loop: bool = True, preload: bool = False):
+        super().__init__(resolution, acquire_buffer)
+        if not source:
+            raise ValueError("Replay backend requires camera.source")
+        self.source = Path(source)
+        self.loop = loop
+        self._index = 0
+        self._video = None
+        self._files: List[Path] = []
+        self._cache: Dict[int, np.ndarray] = {}
+        if self.source.is_dir():
+            self._files = sorted(p for p in self.source.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+            if not self._files:
+                raise ValueError(f"No images found in {self.source}")
+            if preload:
+                # Decode once so replay throughput measures the pipeline, not JPEG decoding.
+                for idx in range(len(self._files)):
+                    self._cache[idx] = self._decode(idx)
+        elif cv2 is not None:
+            self._video = cv2.VideoCapture(str(self.source))
+            if not self._video.isOpened():
+                raise ValueError(f"Unable to open video {self.source}")
+        else:
+            raise ValueError(f"Replay source {self.source} is not a directory and OpenCV is unavailable")
+        self.logger.info("Replay backend reading from %s", self.source)
+
+    def _decode(self, idx: int) -> np.ndarray:
+        with Image.open(self._files[idx]) as image:
+            array = np.asarray(image.convert("RGB"))
+        width, height = self.resolution
+        if array.shape[:2] != (height, width):
+            array = np.asarray(Image.fromarray(array).resize((width, height)))
+        return array
+
+    def read(self) -> Optional[np.ndarray]:
+        if self._video is not None:
+            ret, frame = self._video.read()
+            if not ret and self.loop:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self._video.read()
+            if not ret:
+                return None
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+            return self._fit(frame)
+
+        if self._index >= len(self._files):
+            if not self.loop:
+                return None
+            self._index = 0
+        idx = self._index
+        self._index += 1
+        array = self._cache.get(idx)
+        if array is None:
+            array = self._decode(idx)
+        return self._fit(array)
+
+    def close(self) -> None:
+        if self._video is not None:
+            self._video.release()
+
+
+class SyntheticBackend(CameraBackend):
+    """Deterministic plankton-like frames: dark translucent ellipses drifting over a bright field."""
+
+    name = "synthetic"
+
+    def __init__(self, resolution, acquire_buffer=None, seed: int = 0, organisms: int = 24):
+        super().__init__(resolution, acquire_buffer)
+        width, height = self.resolution
+        rng = np.random.default_rng(seed)
+        self._index = 0
+        yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+        vignette = 1.0 - 0.25 * (((xx - width / 2) / width) ** 2 + ((yy - height / 2) / height) ** 2) * 4
+        tint = np.array([205, 225, 230], dtype=np.float32)
+        self._background = np.clip(vignette[..., None] * tint, 0, 255).astype(np.uint8)
+        # A small bank of noise fields cycled per frame keeps frames distinct without per-frame RNG cost.
+        self._noise = rng.integers(-6, 7, size=(4, height, width, 1), dtype=np.int16)
+        self._origins = rng.uniform((0, 0), (width, height), size=(organisms, 2)).astype(np.float32)
+        self._velocity = rng.uniform(-2.0, 2.0, size=(organisms, 2)).astype(np.float32)
+        self._axes = rng.uniform(6, 28, size=(organisms, 2)).astype(np.float32)
+        self._shade = rng.uniform(0.35, 0.75, size=organisms).astype(np.float32)
+        self.logger.info("Synthetic backend generating %sx%s frames (seed=%s)", width, height, seed)
+
+    def read(self) -> Optional[np.ndarray]:
+        width, height = self.resolution
+        buffer = self.acquire_buffer((height, width, 3))
+        frame_index = self._index
+        self._index += 1
+        work = self._background.astype(np.int16)
+        work += self._noise[frame_index % len(self._noise)]
+        centres = np.mod(self._origins + self._velocity * frame_index, (width, height))
+        for (cx, cy), (ax, ay), shade in zip(centres, self._axes, self._shade):
+            x0, x1 = int(max(cx - ax, 0)), int(min(cx + ax + 1, width))
+            y0, y1 = int(max(cy - ay, 0)), int(min(cy + ay + 1, height))
+            if x0 >= x1 or y0 >= y1:
+                continue
+            ys = (np.arange(y0, y1, dtype=np.float32)[:, None] - cy) / ay
+            xs = (np.arange(x0, x1, dtype=np.float32)[None, :] - cx) / ax
+            radius = xs * xs + ys * ys
+            # Darker membrane ring with a lighter interior, like a diatom or copepod outline.
+            factor = np.where(radius <= 1.0, np.where(radius > 0.7, shade, 0.5 + shade / 2), 1.0)
+            region = work[y0:y1, x0:x1]
+            region[...] = (region * factor[..., None]).astype(np.int16)
+        np.clip(work, 0, 255, out=work)
+        np.copyto(buffer, work, casting="unsafe")
+        return buffer
+
+
+def create_backend(
+    kind: str,
+    resolution: Tuple[int, int],
+    acquire_buffer: Optional[BufferProvider] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> CameraBackend:
+    """Instantiate the requested backend, falling back to the placeholder for `auto`."""
+    options = options or {}
+    kind = (kind or "auto").lower()
+    if kind == "replay":
+        return ReplayBackend(
+            resolution,
+            acquire_buffer,
+            source=options.get("source"),
+            loop=options.get("loop", True),
+            preload=options.get("preload", False),
+        )
+    if kind == "synthetic":
+        return SyntheticBackend(resolution, acquire_buffer, seed=options.get("seed", 0), organisms=options.get("organisms", 24))
+    if kind == "placeholder":
+        return PlaceholderBackend(resolution, acquire_buffer)
+    if kind in ("auto", "picamera2") and Picamera2 is not None:
+        return Picamera2Backend(resolution, acquire_buffer)
+    if kind in ("auto", "opencv") and cv2 is not None:
+        try:
+            return OpenCVBackend(resolution, acquire_buffer, device=options.get("device", 0))
+        except RuntimeError as exc:
+            logging.getLogger(__name__).error("%s", exc)
+    logging.getLogger(__name__).warning("No camera backend available; running in placeholder mode")
+    return PlaceholderBackend(resolution, acquire_buffer)
@@ -0,0 +1,84 @@
+"""Bounded frame queues with configurable load-shedding policies."""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Any, Callable, Optional
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+KEEP_EVERY_NTH = "every_nth"
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST, KEEP_EVERY_NTH)
+
+
+class SheddingQueue:
+    """FIFO of at most `maxsize` items that sheds load instead of growing.
+
+    When the queue is full a new item is handled according to `policy`:
+
+    - `block`: wait for room, pausing the producer (lossless).
+    - `drop_oldest`: evict the oldest waiting item, so consumers always see
+      the freshest frames and latency stays bounded.
+    - `drop_newest`: discard the incoming item.
+    - `every_nth`: while the queue stays full, keep only every `keep_every`-th
+      incoming item (waiting for room for it) and discard the rest, so an
+      overloaded run is subsampled evenly in time.
+
+    Dropped items are passed to `on_shed`. `put(..., force=True)` always
+    enqueues and is meant for end-of-stream markers.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 2,
+        policy: str = BLOCK,
+        keep_every: int = 2,
+        on_shed: Optional[Callable[[Any], None]] = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy {policy!r}; expected one of {', '.join(POLICIES)}")
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.keep_every = max(1, int(keep_every))
+        self.on_shed = on_shed
+        self.shed = 0
+        self._items: deque = deque()
+        self._overflow = 0
+        self._condition = threading.Condition()
+
+    def put(self, item: Any, force: bool = False) -> bool:
+        """Enqueue `item`; False when it was shed."""
+        dropped = None
+        with self._condition:
+            if force or len(self._items) < self.maxsize:
+                self._overflow = 0
+            elif self.policy == DROP_OLDEST:
+                dropped = self._items.popleft()
+            elif self.policy == DROP_NEWEST:
+                dropped = item
+            elif self.policy == KEEP_EVERY_NTH and (self._overflow + 1) % self.keep_every:
+                self._overflow += 1
+                dropped = item
+            else:
+                self._overflow = 0
+                self._condition.wait_for(lambda: len(self._items) < self.maxsize)
+            if dropped is not item:
+                self._items.append(item)
+                self._condition.notify_all()
+            if dropped is not None:
+                self.shed += 1
+        if dropped is not None and self.on_shed is not None:
+            self.on_shed(dropped)
+        return dropped is not item
+
+    def get(self) -> Any:
+        with self._condition:
+            self._condition.wait_for(lambda: self._items)
+            item = self._items.popleft()
+            self._condition.notify_all()
+            return item
+
+    def qsize(self) -> int:
+        return len(self._items)
@@ -0,0 +1,314 @@
+"""Headless batch processing of image directories or stored images across worker processes."""
+
+from __future__ import annotations
+
+import copy
+import logging
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from core.detections import Detections
+from core.frame import Frame
+from core.metrics import MetricsExporter, PipelineMetrics
+from core.postprocessing import count_per_species
+from core.settings import data_dir, database_path
+from database.db import Database
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp"}
+
+
+@dataclass
+class BatchItem:
+    """One image to process: a file on disk or an image row already in the database."""
+
+    path: Optional[str] = None
+    image_id: Optional[int] = None
+    sample_id: Optional[int] = None
+
+    @property
+    def label(self) -> str:
+        return self.path or f"image:{self.image_id}"
+
+
+@dataclass
+class BatchSummary:
+    """Throughput and latency figures for a finished batch run."""
+
+    processed: int = 0
+    rejected: int = 0
+    failed: int = 0
+    detections: int = 0
+    wall_time: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    species: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.processed / self.wall_time if self.wall_time > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.latencies, q)) if self.latencies else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"Images processed: {self.processed} (rejected {self.rejected}, failed {self.failed})",
+            f"Detections written: {self.detections}",
+            f"Wall time: {self.wall_time:.1f} s, throughput: {self.throughput:.2f} images/s",
+            "Per-image latency: p50 {:.1f} ms, p95 {:.1f} ms, p99 {:.1f} ms, max {:.1f} ms".format(
+                self.percentile(50) * 1000,
+                self.percentile(95) * 1000,
+                self.percentile(99) * 1000,
+                max(self.latencies, default=0.0) * 1000,
+            ),
+        ]
+        if self.species:
+            lines.append("Species: " + ", ".join(f"{name}={count}" for name, count in sorted(self.species.items())))
+        return "\n".join(lines)
+
+
+def iter_directory(directory: Path, recursive: bool = False) -> Iterator[BatchItem]:
+    """Image files in `directory`, in name order."""
+    pattern = "**/*" if recursive else "*"
+    for path in sorted(Path(directory).glob(pattern)):
+        if path.is_file() and path.suffix.lower() in IMAGE_SUFFIXES:
+            yield BatchItem(path=str(path))
+
+
+def iter_stored_images(database: Database, sample_ids: Optional[Iterable[int]] = None) -> Iterator[BatchItem]:
+    """Image rows with pixel data already in the database."""
+    for image_id, sample_id, _ in database.list_image_refs(sample_ids):
+        yield BatchItem(image_id=image_id, sample_id=sample_id)
+
+
+def worker_settings(settings: Dict[str, Any], workers: int) -> Dict[str, Any]:
+    """Settings for a processing-only PipelineManager inside a batch worker.
+
+    No camera hardware is opened, frame-to-frame state (change detection,
+    tracking) is off because images are unrelated, nested pools are
+    disabled, and inference threads are split between the workers. Metrics
+    export is off because the parent exports metrics once; the on-disk cache
+    tier stays shared, as its writes are atomic per process.
+    """
+    settings = copy.deepcopy(settings)
+    settings.setdefault("camera", {}).update(backend="placeholder", background_grabber=False)
+    settings.setdefault("change_detection", {})["enabled"] = False
+    settings.setdefault("tracking", {})["enabled"] = False
+    settings.setdefault("parallel", {})["enabled"] = False
+    settings.setdefault("pipeline", {})["staged"] = False
+    settings.setdefault("metrics", {})["file"] = None
+    inference = settings.setdefault("inference", {})
+    inference["threads"] = max(1, int(inference.get("threads", 4)) // max(1, workers))
+    return settings
+
+
+# Per-process state, set up by _init_worker.
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(settings: Dict[str, Any], preset: Optional[str], gate: bool, store_images: bool) -> None:
+    from core.manager import PipelineManager
+
+    manager = PipelineManager(settings)
+    if preset:
+        manager.set_preset(preset)
+    manager.inference_engine.wait_until_ready()
+    _worker.update(manager=manager, gate=gate, store_images=store_images)
+
+
+def _load(item: BatchItem, manager) -> Image.Image:
+    if item.path is not None:
+        return Image.open(item.path)
+    data = manager.database.get_image_data(item.image_id)
+    if data is None:
+        raise FileNotFoundError(f"Image {item.image_id} has no data")
+    return Image.open(BytesIO(data))
+
+
+def _process_items(chunk: List[Tuple[int, BatchItem]]) -> List[Dict[str, Any]]:
+    """Run a chunk of images through preprocessing, inference and postprocessing.
+
+    The chunk goes through `process_frames`, so with inference batching
+    enabled its images share engine batches. Images stored in the database
+    were preprocessed when they were captured and skip preprocessing here.
+    """
+    manager = _worker["manager"]
+    started = time.perf_counter()
+    outputs: List[Dict[str, Any]] = []
+    loaded: List[Tuple[BatchItem, Frame]] = []
+    for sequence, item in chunk:
+        try:
+            with _load(item, manager) as image:
+                loaded.append((item, Frame.from_pil(image, timestamp=time.time(), sequence=sequence)))
+        except Exception as exc:
+            outputs.append({"item": item, "error": f"{type(exc).__name__}: {exc}", "latency": time.perf_counter() - started})
+    files = [(item, frame) for item, frame in loaded if item.image_id is None]
+    stored = [(item, frame) for item, frame in loaded if item.image_id is not None]
+    try:
+        results = manager.process_frames([frame for _, frame in files], gate=_worker["gate"])
+        results += manager.process_frames([frame for _, frame in stored], gate=_worker["gate"], preprocess=False)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        return outputs + [{"item": item, "error": error, "latency": time.perf_counter() - started} for item, _ in loaded]
+    loaded = files + stored
+    latency = (time.perf_counter() - started) / max(1, len(chunk))
+    for (item, _), result in zip(loaded, results):
+        data = None
+        if _worker["store_images"] and item.image_id is None and not result.get("rejected"):
+            buffer = BytesIO()
+            result["image"].to_pil().save(buffer, format="JPEG")
+            data = buffer.getvalue()
+        outputs.append(
+            {
+                "item": item,
+                "rejected": result.get("rejected"),
+                "detections": result["detections"],
+                "data": data,
+                "latency": latency,
+            }
+        )
+    return outputs
+
+
+def _chunks(items: Iterable[BatchItem], size: int) -> Iterator[List[Tuple[int, BatchItem]]]:
+    chunk: List[Tuple[int, BatchItem]] = []
+    for sequence, item in enumerate(items, start=1):
+        chunk.append((sequence, item))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BatchRunner:
+    """Process many images with a pool of processing-only PipelineManagers.
+
+    Workers decode, preprocess, infer and postprocess; the parent is the
+    only database writer and commits results in chunks, so SQLite never
+    sees concurrent writers. The parent also keeps the run's metrics and
+    is the only process that exports them.
+    """
+
+    def __init__(
+        self,
+        settings: Dict[str, Any],
+        workers: Optional[int] = None,
+        gate: bool = False,
+        store_images: bool = False,
+        replace: bool = False,
+        preset: Optional[str] = None,
+        commit_every: int = 64,
+        chunksize: int = 4,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.settings = settings
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.gate = gate
+        self.store_images = store_images
+        self.replace = replace
+        self.preset = preset
+        self.commit_every = max(1, int(commit_every))
+        self.chunksize = max(1, int(chunksize))
+        self.database = Database(db_path=database_path(settings))
+        metrics_settings = settings.get("metrics", {})
+        self.metrics = PipelineMetrics(
+            window=metrics_settings.get("window", 1024),
+            enabled=metrics_settings.get("enabled", True),
+        )
+
+    def _exporter(self) -> Optional[MetricsExporter]:
+        metrics_settings = self.settings.get("metrics", {})
+        if not self.metrics.enabled or not metrics_settings.get("file"):
+            return None
+        return MetricsExporter(
+            self.metrics,
+            data_dir(self.settings) / metrics_settings["file"],
+            interval=metrics_settings.get("interval", 10.0),
+            fmt=metrics_settings.get("format", "jsonl"),
+        )
+
+    def run(self, items: Iterable[BatchItem], sample_metadata: Optional[Dict[str, Any]] = None) -> BatchSummary:
+        """Process `items`; new image files are stored under one new sample."""
+        summary = BatchSummary()
+        started = time.perf_counter()
+        initargs = (worker_settings(self.settings, self.workers), self.preset, self.gate, self.store_images)
+        exporter = self._exporter()
+        try:
+            summary.detections = self._collect(items, initargs, summary, sample_metadata)
+        finally:
+            if exporter is not None:
+                exporter.close()
+        summary.wall_time = time.perf_counter() - started
+        return summary
+
+    def _write(self, pending: List[Dict[str, Any]]) -> int:
+        with self.metrics.timer("save"):
+            return self.database.write_batch_results(pending, replace=self.replace)
+
+    def _collect(
+        self,
+        items: Iterable[BatchItem],
+        initargs: Tuple[Any, ...],
+        summary: BatchSummary,
+        sample_metadata: Optional[Dict[str, Any]],
+    ) -> int:
+        """Fan items out to the workers and write their results; returns the number of detections written."""
+        written = 0
+        new_sample_id: Optional[int] = None
+        pending: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        with multiprocessing.get_context().Pool(self.workers, initializer=_init_worker, initargs=initargs) as pool:
+            outputs = (
+                output
+                for chunk_outputs in pool.imap_unordered(_process_items, _chunks(items, self.chunksize))
+                for output in chunk_outputs
+            )
+            for output in outputs:
+                summary.latencies.append(output["latency"])
+                self.metrics.record("total", output["latency"])
+                item: BatchItem = output["item"]
+                if output.get("error"):
+                    summary.failed += 1
+                    self.metrics.tick("failed")
+                    self.logger.error("Failed to process %s: %s", item.label, output["error"])
+                    continue
+                summary.processed += 1
+                self.metrics.tick("processed")
+                if output["rejected"]:
+                    summary.rejected += 1
+                    self.metrics.tick("rejected")
+                    continue
+                detections: Detections = output["detections"]
+                sample_id = item.sample_id
+                if sample_id is None:
+                    if new_sample_id is None:
+                        new_sample_id = self.database.insert_sample(sample_metadata or {"notes": "batch run"})
+                    sample_id = new_sample_id
+                pending.append(
+                    {
+                        "sample_id": sample_id,
+                        "image_id": item.image_id,
+                        "filename": Path(item.path).name if item.path else None,
+                        "data": output["data"],
+                        "detections": detections,
+                    }
+                )
+                for name, count in count_per_species(detections).items():
+                    summary.species[name] = summary.species.get(name, 0) + count
+                if len(pending) >= self.commit_every:
+                    written += self._write(pending)
+                    pending = []
+                if summary.processed % 500 == 0:
+                    elapsed = time.perf_counter() - started
+                    self.logger.info("Processed %s images (%.2f images/s)", summary.processed, summary.processed / elapsed)
+        if pending:
+            written += self._write(pending)
+        return written
@@ -0,0 +1,107 @@
+"""Micro-batching scheduler in front of the InferenceEngine."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.inference import InferenceEngine
+
+_SENTINEL = None
+
+
+class BatchScheduler:
+    """Queue images or tiles and run them through the engine in batches.
+
+    A batch is dispatched once `max_batch` items are waiting or `max_delay`
+    seconds after the first item of the batch arrived, whichever is sooner.
+    Items submitted with `flush=True` end the wait early: a caller that is
+    about to block on its results gets them without the batching delay,
+    batched with whatever other callers have already queued.
+    """
+
+    def __init__(self, engine: InferenceEngine, max_batch: int = 8, max_delay: float = 0.01, max_queue: int = 256):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.engine = engine
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max(0.0, float(max_delay))
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[Optional[Tuple[np.ndarray, Future, bool]]]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="BatchScheduler", daemon=True)
+        self._worker.start()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, image: np.ndarray, flush: bool = False) -> "Future[Dict[str, Any]]":
+        """Queue one image; the future resolves to the engine's result dict."""
+        if self._closed:
+            raise RuntimeError("BatchScheduler is closed")
+        future: Future = Future()
+        self._queue.put((image, future, flush))
+        return future
+
+    def submit_many(self, images: List[np.ndarray], flush: bool = False) -> List["Future[Dict[str, Any]]"]:
+        """Queue several images; with `flush`, the batch holding the last one is dispatched without delay."""
+        last = len(images) - 1
+        return [self.submit(image, flush=flush and idx == last) for idx, image in enumerate(images)]
+
+    def _collect(self, first: Tuple[np.ndarray, Future, bool]) -> Tuple[List[Tuple[np.ndarray, Future, bool]], bool]:
+        batch = [first]
+        flush = first[2]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = 0.0 if flush else deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _SENTINEL:
+                return batch, True
+            batch.append(item)
+            flush = flush or item[2]
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _SENTINEL:
+                break
+            batch, stopping = self._collect(first)
+            live = [(image, future) for image, future, _ in batch if future.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                results = self.engine.run_batch([image for image, _ in live])
+            except Exception as exc:
+                self.logger.exception("Batch inference failed for %s items", len(live))
+                for _, future in live:
+                    future.set_exception(exc)
+                continue
+            for (_, future), result in zip(live, results):
+                future.set_result(result)
+            self.batches += 1
+            self.items += len(live)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def close(self) -> None:
+        """Finish queued work and stop the worker thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_SENTINEL)
+        self._worker.join()
+        self.logger.info("BatchScheduler closed (%s batches, mean size %.1f)", self.batches, self.mean_batch_size)
@@ -0,0 +1,104 @@
+"""Content-addressed cache for inference results."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from core.detections import Detections
+
+
+def content_hash(array: np.ndarray) -> str:
+    """Hash pixel data together with shape and dtype."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str((array.shape, array.dtype.str)).encode("ascii"))
+    digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()
+
+
+class InferenceCache:
+    """Two-tier (memory LRU + optional on-disk JSON) cache of detection batches.
+
+    Keys combine the image content hash with a model identity string, so a
+    different model file or threshold never returns stale detections.
+    """
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[Path] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_entries = max(1, int(max_entries))
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Detections]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(array: np.ndarray, identity: str) -> str:
+        return f"{content_hash(array)}-{hashlib.blake2b(identity.encode('utf-8'), digest_size=8).hexdigest()}"
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Detections]:
+        with self._lock:
+            detections = self._entries.get(key)
+            if detections is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return detections
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with path.open("r", encoding="utf-8") as file:
+                    detections = Detections.from_json(json.load(file))
+            except (OSError, ValueError, TypeError, AttributeError):
+                detections = None
+            if detections is not None:
+                self._remember(key, detections)
+                with self._lock:
+                    self.disk_hits += 1
+                return detections
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key: str, detections: Detections) -> None:
+        with self._lock:
+            self._entries[key] = detections
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key: str, detections: Detections) -> None:
+        # Batches are immutable, so the memory tier can hold the caller's object.
+        self._remember(key, detections)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Unique per process and thread, so batch workers sharing the directory never collide.
+                tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                with tmp_path.open("w", encoding="utf-8") as file:
+                    json.dump(detections.to_json(), file)
+                os.replace(tmp_path, path)
+            except OSError:
+                self.logger.exception("Failed to write cache entry %s", key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
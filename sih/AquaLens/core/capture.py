@@ -2,99 +2,325 @@
 
 from __future__ import annotations
 
+import itertools
 import logging
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
-try:
-    import cv2
-except ImportError:
-    cv2 = None
+import numpy as np
 
-try:
-    from picamera2 import Picamera2  # type: ignore
-except ImportError:
-    Picamera2 = None
+from core.backends import CameraBackend, create_backend
+from core.frame import Frame, FramePool
+from core.metrics import PipelineMetrics
+from core.quality import QualityMetrics, compute_quality
+from core.storage import FrameWriter
 
-from PIL import Image
+
+class FrameGrabber(threading.Thread):
+    """Background thread that keeps the newest camera frames in a ring buffer."""
+
+    def __init__(
+        self,
+        read_frame,
+        buffer_size: int = 4,
+        fps: Optional[float] = None,
+        next_sequence: Optional[Callable[[], int]] = None,
+    ):
+        super().__init__(name="FrameGrabber", daemon=True)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._read_frame = read_frame
+        self._buffer: deque = deque(maxlen=max(1, int(buffer_size)))
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._interval = 1.0 / fps if fps else 0.0
+        self._next_sequence = next_sequence or itertools.count(1).__next__
+        self._sequence = 0
+        self.frames = 0
+
+    def run(self) -> None:
+        self.logger.info("Frame grabber started (buffer=%s)", self._buffer.maxlen)
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                data = self._read_frame()
+            except Exception:  # pragma: no cover - backend specific failures
+                self.logger.exception("Frame grabber read failed")
+                data = None
+            if data is None:
+                self._stop_event.wait(0.01)
+                continue
+            with self._condition:
+                self._sequence = self._next_sequence()
+                self.frames += 1
+                self._buffer.append(Frame(array=data, timestamp=time.monotonic(), sequence=self._sequence))
+                self._condition.notify_all()
+            if self._interval:
+                remaining = self._interval - (time.monotonic() - started)
+                if remaining > 0:
+                    self._stop_event.wait(remaining)
+        self.logger.info("Frame grabber stopped after %s frames", self.frames)
+
+    def latest(self, newer_than: int = 0, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Return newest buffered frame, waiting up to timeout for one newer than `newer_than`."""
+        with self._condition:
+            if timeout:
+                self._condition.wait_for(
+                    lambda: self._buffer and self._buffer[-1].sequence > newer_than,
+                    timeout=timeout,
+                )
+            if not self._buffer or self._buffer[-1].sequence <= newer_than:
+                return None
+            return self._buffer[-1]
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Signal the thread to exit and wait for it."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
 
 
 class CameraManager:
     """Manage camera preview and capture."""
 
-    def __init__(self, output_dir: Optional[Path] = None, resolution=(1280, 720)):
+    def __init__(
+        self,
+        output_dir: Optional[Path] = None,
+        resolution=(1280, 720),
+        fps: Optional[float] = None,
+        background_grabber: bool = False,
+        buffer_size: int = 4,
+        storage: Optional[Dict[str, Any]] = None,
+        backend: str = "auto",
+        backend_options: Optional[Dict[str, Any]] = None,
+        quality: Optional[Dict[str, Any]] = None,
+        metrics: Optional[PipelineMetrics] = None,
+    ):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.output_dir = Path(output_dir) if output_dir else None
-        self.resolution = resolution
-        self._camera = None
-        self._capture_device = None
-        self.logger.info("CameraManager initialized with resolution %s", resolution)
+        self.resolution = tuple(resolution)
+        self.fps = fps
+        self.background_grabber = background_grabber
+        self.buffer_size = buffer_size
+        self.backend_name = backend
+        self.backend_options = backend_options or {}
+        self._backend: Optional[CameraBackend] = None
+        self._grabber: Optional[FrameGrabber] = None
+        self._read_lock = threading.Lock()
+        self._pool: Optional[FramePool] = None
+        self.storage = storage or {}
+        self._writer: Optional[FrameWriter] = None
+        # One counter for grabber and direct reads, so sequences (and raw file names) never repeat.
+        self._sequence = itertools.count(1)
+        self.metrics = metrics or PipelineMetrics(enabled=False)
+        self.quality_settings = quality or {}
+        self._quality_cache: Optional[tuple] = None
+        self.logger.info("CameraManager initialized with resolution %s", self.resolution)
 
     def _init_camera(self) -> None:
-        """Initialize camera using available backend."""
-        if Picamera2 is not None:
-            self._camera = Picamera2()
-            config = self._camera.create_preview_configuration(
-                main={"size": self.resolution}
-            )
-            self._camera.configure(config)
-            self.logger.info("Picamera2 initialized")
-        elif cv2 is not None:
-            self._capture_device = cv2.VideoCapture(0)
-            if not self._capture_device.isOpened():
-                self.logger.error("Unable to open CV2 capture device")
-            else:
-                self._capture_device.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
-                self._capture_device.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
-                self.logger.info("OpenCV capture initialized")
-        else:
-            self.logger.warning("No camera backend available; running in placeholder mode")
+        """Initialize the configured camera backend."""
+        self._backend = create_backend(
+            self.backend_name,
+            self.resolution,
+            acquire_buffer=self._acquire_buffer,
+            options=self.backend_options,
+        )
+        self.logger.info("Camera backend: %s", self._backend.name)
+
+    def _acquire_buffer(self, shape) -> np.ndarray:
+        """Return a reusable frame buffer of the given shape."""
+        if self._pool is None or self._pool.shape != tuple(shape):
+            self._pool = FramePool(shape, max_buffers=self.buffer_size + 4)
+        return self._pool.acquire()
+
+    def _read_frame(self) -> Optional[np.ndarray]:
+        """Read one RGB frame from the active backend on the calling thread."""
+        with self._read_lock:
+            if self._backend is None:
+                return None
+            with self.metrics.timer("capture"):
+                array = self._backend.read()
+        if array is not None:
+            self.metrics.tick("camera")
+        return array
 
     def start_preview(self) -> None:
-        """Start camera preview (placeholder hooks)."""
-        if self._camera is None and self._capture_device is None:
+        """Start camera preview and, when enabled, the background grabber."""
+        if self._backend is None:
             self._init_camera()
-        if self._camera:
-            self._camera.start()
+        self._backend.start()
+        if self.background_grabber:
+            self.start_grabber()
         self.logger.debug("Preview started")
 
-    def capture_image(self) -> Optional[Image.Image]:
-        """Capture a single frame and return as PIL Image."""
-        if self._camera is None and self._capture_device is None:
+    def start_grabber(self) -> None:
+        """Start continuous acquisition into the latest-frame ring buffer."""
+        if self._grabber and self._grabber.is_alive():
+            return
+        if self._backend is None:
+            self._init_camera()
+        self._backend.start()
+        fps = None if self._backend.live else self.fps
+        self._grabber = FrameGrabber(
+            self._read_frame, buffer_size=self.buffer_size, fps=fps, next_sequence=self._sequence.__next__
+        )
+        self._grabber.start()
+
+    def stop_grabber(self) -> None:
+        """Stop the background grabber if it is running."""
+        if self._grabber:
+            self._grabber.stop()
+            self._grabber = None
+
+    def latest_frame(self, newer_than: int = 0, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Return the newest buffered frame; None when the grabber is not running."""
+        if not self._grabber:
+            return None
+        return self._grabber.latest(newer_than=newer_than, timeout=timeout)
+
+    def _next_frame(self, newer_than: int = 0) -> Optional[Frame]:
+        """Return a frame newer than `newer_than` from the grabber or a direct read."""
+        if self._backend is None:
             self._init_camera()
+        if self.background_grabber and self._grabber is None:
+            self.start_grabber()
 
-        if self._camera:
-            frame = self._camera.capture_array()
+        if self._grabber and self._grabber.is_alive():
+            frame = self._grabber.latest(newer_than=newer_than, timeout=1.0)
             if frame is None:
-                self.logger.error("Picamera2 returned no frame")
-                return None
-            image = Image.fromarray(frame)
-        elif self._capture_device and cv2 is not None:
-            ret, frame = self._capture_device.read()
-            if not ret:
-                self.logger.error("OpenCV failed to read frame")
-                return None
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image = Image.fromarray(rgb_frame)
-        else:
-            self.logger.info("Placeholder capture used (blank image)")
-            image = Image.new("RGB", self.resolution, color=(0, 92, 128))
+                self.logger.error("Frame grabber has no frame available")
+            return frame
+
+        array = self._read_frame()
+        if array is None:
+            return None
+        return Frame(array=array, timestamp=time.monotonic(), sequence=next(self._sequence))
+
+    def _store_raw(self, frame: Frame) -> None:
+        """Queue the raw frame for write-behind persistence when configured."""
+        if not self.output_dir:
+            return
+        if self._writer is None:
+            self._writer = FrameWriter(
+                self.output_dir,
+                workers=self.storage.get("writer_threads", 2),
+                max_queue=self.storage.get("writer_queue", 32),
+                naming=self.storage.get("naming", "sequence"),
+                image_format=self.storage.get("format", "jpg"),
+                quality=self.storage.get("jpeg_quality", 90),
+                fsync=self.storage.get("fsync", False),
+            )
+        self._writer.submit(frame, block=self.storage.get("block_when_full", True))
+
+    @property
+    def storage_pending(self) -> int:
+        """Raw frames waiting to be written to disk."""
+        return self._writer.pending if self._writer is not None else 0
+
+    def capture_image(self) -> Optional[Frame]:
+        """Capture a single frame and return it as a NumPy-backed `Frame`."""
+        frame = self._next_frame()
+        if frame is not None:
+            self._store_raw(frame)
+        return frame
+
+    def iter_frames(
+        self,
+        count: Optional[int] = None,
+        interval: Optional[float] = None,
+        duration: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+        store: bool = True,
+    ) -> Iterator[Frame]:
+        """Yield distinct frames until `count`, `duration` or `stop_event` ends the run.
+
+        With `interval` set, frames are scheduled on a fixed monotonic grid so
+        slow iterations do not accumulate drift; missed slots are skipped and
+        counted as shed frames.
+        """
+        started = time.monotonic()
+        next_due = started
+        last_sequence = 0
+        produced = 0
+        while count is None or produced < count:
+            if stop_event is not None and stop_event.is_set():
+                break
+            now = time.monotonic()
+            if duration is not None and now - started >= duration:
+                break
+            if interval:
+                delay = next_due - now
+                if delay > 0:
+                    if stop_event is not None:
+                        if stop_event.wait(delay):
+                            break
+                    else:
+                        time.sleep(delay)
+                now = time.monotonic()
+                missed = int((now - next_due) // interval)
+                if missed > 0:
+                    self.metrics.tick("shed", missed)
+                next_due += (max(missed, 0) + 1) * interval
+            frame = self._next_frame(newer_than=last_sequence)
+            if frame is None:
+                self.logger.error("Acquisition stopped after %s frames; camera returned no frame", produced)
+                break
+            last_sequence = frame.sequence
+            if store:
+                self._store_raw(frame)
+            produced += 1
+            yield frame
+
+    def capture_burst(self, count: int, fps: Optional[float] = None, store: bool = True) -> List[Frame]:
+        """Capture `count` frames as fast as the camera allows, or paced to `fps`."""
+        frames = list(self.iter_frames(count=count, interval=1.0 / fps if fps else None, store=store))
+        self.logger.info("Burst captured %s/%s frames", len(frames), count)
+        return frames
+
+    def capture_timelapse(
+        self,
+        interval: float,
+        count: Optional[int] = None,
+        duration: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> Iterator[Frame]:
+        """Yield one frame every `interval` seconds for a sample run."""
+        self.logger.info("Time-lapse started (interval=%ss, count=%s, duration=%s)", interval, count, duration)
+        return self.iter_frames(count=count, interval=interval, duration=duration, stop_event=stop_event)
+
+    def quality_metrics(self, frame: Optional[Frame] = None) -> Optional[QualityMetrics]:
+        """Return focus/exposure metrics for `frame`, or for the newest buffered frame."""
+        frame = frame if frame is not None else self.latest_frame()
+        if frame is None:
+            return None
+        cached = self._quality_cache
+        if cached is not None and cached[0] is frame.array:
+            return cached[1]
+        metrics = compute_quality(
+            frame.array,
+            roi_fraction=self.quality_settings.get("roi_fraction", 0.5),
+            step=self.quality_settings.get("step", 2),
+        )
+        self._quality_cache = (frame.array, metrics)
+        return metrics
 
-        if self.output_dir:
-            self.output_dir.mkdir(parents=True, exist_ok=True)
-            file_path = self.output_dir / "capture_placeholder.jpg"
-            image.save(file_path)
-            self.logger.info("Captured image saved to %s", file_path)
+    def sensor_metadata(self) -> Dict[str, Any]:
+        """Return exposure/gain metadata reported by the backend for the last frame."""
+        return dict(self._backend.last_metadata) if self._backend else {}
 
-        return image
+    @property
+    def streaming(self) -> bool:
+        return bool(self._grabber and self._grabber.is_alive())
 
     def stop_preview(self) -> None:
-        """Stop camera preview and release resources."""
-        if self._camera:
-            self._camera.stop()
-            self._camera.close()
-            self._camera = None
-        if self._capture_device and cv2 is not None:
-            self._capture_device.release()
-            self._capture_device = None
+        """Stop camera preview, flush pending raw frames and release resources."""
+        self.stop_grabber()
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        if self._backend:
+            self._backend.close()
+            self._backend = None
         self.logger.debug("Preview stopped and resources released")
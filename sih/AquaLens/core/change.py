@@ -0,0 +1,67 @@
+"""Block-level change detection between consecutive frames."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+
+class ChangeDetector:
+    """Track which blocks of the field changed since their detections were last computed.
+
+    Each block is summarised by the mean of a strided green-channel sample.
+    A block counts as changed when its mean moved more than `threshold` grey
+    levels from the reference, which is only advanced for regions that were
+    re-inferred; slow drift therefore still triggers inference eventually.
+    """
+
+    def __init__(self, block_size: int = 32, threshold: float = 4.0, step: int = 4):
+        self.block_size = max(step, int(block_size))
+        self.threshold = float(threshold)
+        self.step = max(1, int(step))
+        self._reference: Optional[np.ndarray] = None
+        self._current: Optional[np.ndarray] = None
+
+    def block_means(self, array: np.ndarray) -> np.ndarray:
+        sample = array[:: self.step, :: self.step]
+        if sample.ndim == 3:
+            sample = sample[..., 1]
+        cell = self.block_size // self.step
+        rows, cols = max(1, sample.shape[0] // cell), max(1, sample.shape[1] // cell)
+        sample = sample[: rows * cell, : cols * cell]
+        return sample.reshape(rows, cell, cols, cell).mean(axis=(1, 3), dtype=np.float32)
+
+    def changed(self, array: np.ndarray) -> Optional[np.ndarray]:
+        """Return a boolean block grid of changed blocks, or None when there is no usable reference."""
+        self._current = self.block_means(array)
+        if self._reference is None or self._reference.shape != self._current.shape:
+            self._reference = None
+            return None
+        return np.abs(self._current - self._reference) > self.threshold
+
+    def _block_range(self, start: int, length: int, limit: int, margin: int) -> slice:
+        first = max(0, start // self.block_size - margin)
+        last = min(limit, -(-(start + length) // self.block_size) + margin)
+        return slice(first, last)
+
+    def region_changed(self, mask: np.ndarray, x: int, y: int, width: int, height: int, margin: int = 1) -> bool:
+        """True when any block overlapping the region (grown by `margin` blocks) changed."""
+        rows = self._block_range(y, height, mask.shape[0], margin)
+        cols = self._block_range(x, width, mask.shape[1], margin)
+        return bool(mask[rows, cols].any())
+
+    def accept(self, x: Optional[int] = None, y: Optional[int] = None, width: int = 0, height: int = 0) -> None:
+        """Advance the reference to the current frame, for one region or the whole frame."""
+        if self._current is None:
+            return
+        if self._reference is None or x is None or y is None:
+            self._reference = self._current.copy()
+            return
+        rows = self._block_range(y, height, self._current.shape[0], 0)
+        cols = self._block_range(x, width, self._current.shape[1], 0)
+        self._reference[rows, cols] = self._current[rows, cols]
+
+    def reset(self) -> None:
+        self._reference = None
+        self._current = None
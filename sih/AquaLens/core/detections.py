@@ -0,0 +1,153 @@
+"""Columnar container for detection batches."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+class Detections:
+    """Struct-of-arrays batch of detections.
+
+    `boxes` is an (N, 4) float32 array of [x1, y1, x2, y2] pixels, `scores`
+    float32 confidences and `class_ids` int32 species ids indexing `names`.
+    `tile_ids` holds the int32 index of the tile each detection was found
+    in, or is None when inference ran on the whole frame.
+    Batches are treated as immutable: indexing, filtering and offsetting
+    return new batches and never modify the arrays they were built from.
+    """
+
+    __slots__ = ("boxes", "scores", "class_ids", "names", "tile_ids")
+
+    def __init__(
+        self,
+        boxes: Optional[np.ndarray] = None,
+        scores: Optional[np.ndarray] = None,
+        class_ids: Optional[np.ndarray] = None,
+        names: Sequence[str] = (),
+        tile_ids: Optional[np.ndarray] = None,
+    ):
+        self.boxes = np.asarray(boxes if boxes is not None else (), dtype=np.float32).reshape(-1, 4)
+        count = len(self.boxes)
+        self.scores = np.asarray(scores if scores is not None else np.zeros(count), dtype=np.float32).reshape(-1)
+        self.class_ids = np.asarray(class_ids if class_ids is not None else np.zeros(count), dtype=np.int32).reshape(-1)
+        if len(self.scores) != count or len(self.class_ids) != count:
+            raise ValueError(f"Column lengths differ: {count} boxes, {len(self.scores)} scores, {len(self.class_ids)} ids")
+        self.names = tuple(names)
+        self.tile_ids = None if tile_ids is None else np.asarray(tile_ids, dtype=np.int32).reshape(-1)
+        if self.tile_ids is not None and len(self.tile_ids) != count:
+            raise ValueError(f"Column lengths differ: {count} boxes, {len(self.tile_ids)} tile ids")
+
+    @classmethod
+    def empty(cls, names: Sequence[str] = ()) -> "Detections":
+        return cls(names=names)
+
+    @classmethod
+    def concat(cls, parts: Iterable["Detections"], names: Optional[Sequence[str]] = None) -> "Detections":
+        """Concatenate batches that share a species vocabulary."""
+        parts = list(parts)
+        if names is None:
+            names = next((part.names for part in parts if part.names), ())
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty(names)
+        if len(parts) == 1:
+            return cls(parts[0].boxes, parts[0].scores, parts[0].class_ids, names, parts[0].tile_ids)
+        tiled = all(part.tile_ids is not None for part in parts)
+        return cls(
+            np.concatenate([part.boxes for part in parts]),
+            np.concatenate([part.scores for part in parts]),
+            np.concatenate([part.class_ids for part in parts]),
+            names,
+            np.concatenate([part.tile_ids for part in parts]) if tiled else None,
+        )
+
+    @classmethod
+    def from_dicts(cls, detections: Iterable[Dict[str, Any]], names: Sequence[str] = ()) -> "Detections":
+        """Build a batch from legacy detection dicts; unknown species extend the vocabulary."""
+        vocabulary = list(names)
+        lookup = {name: idx for idx, name in enumerate(vocabulary)}
+        boxes, scores, class_ids = [], [], []
+        for detection in detections:
+            class_id = detection.get("species_id")
+            if class_id is None:
+                species = detection.get("species")
+                if species not in lookup:
+                    lookup[species] = len(vocabulary)
+                    vocabulary.append(species)
+                class_id = lookup[species]
+            boxes.append(detection["bbox"])
+            scores.append(detection.get("confidence") or 0.0)
+            class_ids.append(class_id)
+        return cls(boxes, scores, class_ids, vocabulary)
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "Detections":
+        return cls(
+            payload.get("boxes"), payload.get("scores"), payload.get("class_ids"), payload.get("names", ()), payload.get("tile_ids")
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        payload = {
+            "boxes": self.boxes.tolist(),
+            "scores": self.scores.tolist(),
+            "class_ids": self.class_ids.tolist(),
+            "names": list(self.names),
+        }
+        if self.tile_ids is not None:
+            payload["tile_ids"] = self.tile_ids.tolist()
+        return payload
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __getitem__(self, index) -> "Detections":
+        """Select rows by slice, integer, index array or boolean mask."""
+        if isinstance(index, (int, np.integer)):
+            index = slice(index, index + 1 if index != -1 else None)
+        tile_ids = None if self.tile_ids is None else self.tile_ids[index]
+        return Detections(self.boxes[index], self.scores[index], self.class_ids[index], self.names, tile_ids)
+
+    def __repr__(self) -> str:
+        return f"Detections(n={len(self)}, species={len(self.names)})"
+
+    def filter(self, mask: np.ndarray) -> "Detections":
+        return self[np.asarray(mask, dtype=bool)]
+
+    def above(self, threshold: float) -> "Detections":
+        return self[self.scores >= threshold]
+
+    def of_species(self, class_id: int) -> "Detections":
+        return self[self.class_ids == class_id]
+
+    def with_boxes(self, boxes: np.ndarray) -> "Detections":
+        return Detections(boxes, self.scores, self.class_ids, self.names, self.tile_ids)
+
+    def with_scores(self, scores: np.ndarray) -> "Detections":
+        return Detections(self.boxes, scores, self.class_ids, self.names, self.tile_ids)
+
+    def from_tile(self, index: int) -> "Detections":
+        """Tag every detection as found in tile `index`."""
+        return Detections(self.boxes, self.scores, self.class_ids, self.names, np.full(len(self), index))
+
+    def offset(self, dx: float, dy: float) -> "Detections":
+        """Translate every box, e.g. from tile to frame coordinates."""
+        if not len(self) or (dx == 0 and dy == 0):
+            return self
+        return self.with_boxes(self.boxes + np.asarray((dx, dy, dx, dy), dtype=np.float32))
+
+    def species_name(self, class_id: int) -> str:
+        return self.names[class_id] if 0 <= class_id < len(self.names) else f"class_{class_id}"
+
+    @property
+    def species(self) -> List[str]:
+        """Species name per row."""
+        return [self.species_name(class_id) for class_id in self.class_ids.tolist()]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Per-detection dicts for display and export."""
+        return [
+            {"species": self.species_name(class_id), "species_id": class_id, "confidence": score, "bbox": box}
+            for box, score, class_id in zip(self.boxes.tolist(), self.scores.tolist(), self.class_ids.tolist())
+        ]
@@ -0,0 +1,84 @@
+"""NumPy-backed frame container shared by the AquaLens pipeline stages."""
+
+from __future__ import annotations
+
+import sys
+import threading
+from dataclasses import dataclass, field, replace
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+@dataclass
+class Frame:
+    """RGB uint8 frame (H x W x 3) with acquisition metadata.
+
+    The array is passed between stages without copying; PIL conversion only
+    happens at the UI/database edge via `to_pil()`.
+    """
+
+    array: np.ndarray
+    timestamp: float = 0.0
+    sequence: int = 0
+    _pil: Optional[Image.Image] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.array.shape
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Frame size as (width, height), matching PIL conventions."""
+        return self.array.shape[1], self.array.shape[0]
+
+    def with_array(self, array: np.ndarray) -> "Frame":
+        """Return a frame sharing this frame's metadata but holding a new array."""
+        if array is self.array:
+            return self
+        return replace(self, array=array)
+
+    def copy(self) -> "Frame":
+        """Detach the frame from any pooled buffer so it can be retained."""
+        return replace(self, array=self.array.copy())
+
+    def to_pil(self) -> Image.Image:
+        """Convert to a PIL image once and cache the result."""
+        if self._pil is None:
+            self._pil = Image.fromarray(np.ascontiguousarray(self.array))
+        return self._pil
+
+    @classmethod
+    def from_pil(cls, image: Image.Image, timestamp: float = 0.0, sequence: int = 0) -> "Frame":
+        return cls(array=np.asarray(image.convert("RGB")), timestamp=timestamp, sequence=sequence)
+
+
+class FramePool:
+    """Pool of preallocated frame buffers that are reused once no frame references them.
+
+    A buffer is considered free when the pool holds the only reference to it;
+    any live `Frame` or array view keeps its base buffer out of circulation,
+    so reuse can never overwrite data a later stage is still reading.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype=np.uint8, max_buffers: int = 8):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.max_buffers = max(1, int(max_buffers))
+        self._buffers: List[np.ndarray] = []
+        self._lock = threading.Lock()
+        probe = [np.empty(0)]
+        for buf in probe:
+            self._free_refcount = sys.getrefcount(buf)
+
+    def acquire(self) -> np.ndarray:
+        """Return a writable buffer, reusing an unreferenced one when possible."""
+        with self._lock:
+            for buf in self._buffers:
+                if sys.getrefcount(buf) <= self._free_refcount:
+                    return buf
+            buf = np.empty(self.shape, dtype=self.dtype)
+            if len(self._buffers) < self.max_buffers:
+                self._buffers.append(buf)
+            return buf
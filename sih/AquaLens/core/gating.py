@@ -0,0 +1,78 @@
+"""Frame gating: drop blurry and near-duplicate frames before inference."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from core.quality import QualityMetrics, compute_quality
+
+
+def difference_hash(array: np.ndarray, hash_size: int = 8) -> int:
+    """Return a 64-bit dHash of an RGB or gray uint8 frame.
+
+    The frame is decimated by striding, block-averaged to
+    (hash_size, hash_size + 1) and each bit records whether a cell is
+    brighter than its right-hand neighbour.
+    """
+    height, width = array.shape[:2]
+    cols = hash_size + 1
+    step = max(1, min(height // (hash_size * 4), width // (cols * 4)))
+    small = array[::step, ::step]
+    gray = small.mean(axis=2) if small.ndim == 3 else small.astype(np.float32)
+    block_h, block_w = gray.shape[0] // hash_size, gray.shape[1] // cols
+    gray = gray[: block_h * hash_size, : block_w * cols]
+    cells = gray.reshape(hash_size, block_h, cols, block_w).mean(axis=(1, 3))
+    bits = cells[:, 1:] > cells[:, :-1]
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+class FrameGate:
+    """Accept or reject frames by sharpness and similarity to the last accepted frame."""
+
+    def __init__(self, min_sharpness: float = 50.0, duplicate_distance: int = 4, enabled: bool = True):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.min_sharpness = min_sharpness
+        self.duplicate_distance = duplicate_distance
+        self.enabled = enabled
+        self.accepted = 0
+        self.dropped_blurry = 0
+        self.dropped_duplicate = 0
+        self._last_hash: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def evaluate(self, array: np.ndarray, metrics: Optional[QualityMetrics] = None) -> Optional[str]:
+        """Return None when the frame should be processed, else the rejection reason."""
+        if not self.enabled:
+            return None
+        if self.min_sharpness:
+            metrics = metrics or compute_quality(array)
+            if metrics.sharpness < self.min_sharpness:
+                with self._lock:
+                    self.dropped_blurry += 1
+                return "blurry"
+        frame_hash = difference_hash(array)
+        with self._lock:
+            if self._last_hash is not None and self.duplicate_distance >= 0:
+                if bin(frame_hash ^ self._last_hash).count("1") <= self.duplicate_distance:
+                    self.dropped_duplicate += 1
+                    return "duplicate"
+            self._last_hash = frame_hash
+            self.accepted += 1
+        return None
+
+    def reset(self) -> None:
+        """Forget the last accepted frame, e.g. when a new sample is loaded."""
+        with self._lock:
+            self._last_hash = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "accepted": self.accepted,
+                "dropped_blurry": self.dropped_blurry,
+                "dropped_duplicate": self.dropped_duplicate,
+            }
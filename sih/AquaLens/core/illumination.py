@@ -0,0 +1,93 @@
+"""Flat-field illumination models cached in the calibration table."""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from database.db import Database
+
+KEY_PREFIX = "flat_field:"
+
+
+def build_flat_field(frames: Iterable[np.ndarray], factor: int = 8) -> np.ndarray:
+    """Estimate a low-resolution gain map (h x w x 1 float32) from blank frames.
+
+    Frames are averaged, reduced to luma and block-averaged by `factor`; the
+    gain is mean(flat) / flat so multiplying a frame by it evens out vignetting.
+    """
+    total: Optional[np.ndarray] = None
+    count = 0
+    for frame in frames:
+        if total is None:
+            total = np.zeros(frame.shape, dtype=np.float32)
+        total += frame
+        count += 1
+    if total is None:
+        raise ValueError("At least one blank frame is required for flat-field calibration")
+    mean = total / count
+    luma = mean @ np.array([0.299, 0.587, 0.114], dtype=np.float32) if mean.ndim == 3 else mean
+    height, width = luma.shape
+    factor = max(1, int(factor))
+    small_h, small_w = max(1, height // factor), max(1, width // factor)
+    luma = luma[: small_h * factor, : small_w * factor]
+    flat = luma.reshape(small_h, factor, small_w, factor).mean(axis=(1, 3))
+    flat = np.maximum(flat, 1.0)
+    gain = np.clip(flat.mean() / flat, 0.2, 5.0).astype(np.float32)
+    return gain[..., None]
+
+
+def encode_flat_field(gain: np.ndarray) -> str:
+    """Serialise a gain map to the JSON text stored in `calibration.value`."""
+    data = np.ascontiguousarray(gain, dtype=np.float16)
+    return json.dumps(
+        {
+            "shape": list(data.shape),
+            "dtype": "float16",
+            "data": base64.b64encode(zlib.compress(data.tobytes())).decode("ascii"),
+            "created_at": datetime.utcnow().isoformat(),
+        }
+    )
+
+
+def decode_flat_field(value: str) -> np.ndarray:
+    payload = json.loads(value)
+    raw = zlib.decompress(base64.b64decode(payload["data"]))
+    return np.frombuffer(raw, dtype=payload.get("dtype", "float16")).reshape(payload["shape"]).astype(np.float32)
+
+
+class IlluminationCalibration:
+    """Load, build and persist per-preset flat-field models."""
+
+    def __init__(self, database: Database, factor: int = 8):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.database = database
+        self.factor = factor
+        self.models: Dict[str, np.ndarray] = {}
+
+    def load_all(self) -> None:
+        """Read every stored flat-field model into memory."""
+        for key, value in self.database.list_calibration(KEY_PREFIX).items():
+            preset = key[len(KEY_PREFIX) :]
+            try:
+                self.models[preset] = decode_flat_field(value)
+            except (ValueError, KeyError, zlib.error):
+                self.logger.exception("Ignoring unreadable flat-field model for preset %s", preset)
+        self.logger.info("Loaded flat-field models: %s", sorted(self.models) or "none")
+
+    def get(self, preset: str) -> Optional[np.ndarray]:
+        return self.models.get(preset)
+
+    def calibrate(self, preset: str, frames: Iterable[np.ndarray]) -> np.ndarray:
+        """Build a model from blank frames, store it and keep it in memory."""
+        gain = build_flat_field(frames, factor=self.factor)
+        self.database.set_calibration(KEY_PREFIX + preset, encode_flat_field(gain))
+        self.models[preset] = gain
+        self.logger.info("Flat-field model stored for preset %s (%sx%s)", preset, gain.shape[1], gain.shape[0])
+        return gain
@@ -1,19 +1,252 @@
-"""Inference placeholder for AquaLens."""
+"""CPU inference backends for AquaLens."""
 
 from __future__ import annotations
 
-from typing import Any, Dict
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from core.detections import Detections
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    import onnxruntime as ort  # type: ignore
+except ImportError:
+    ort = None
+
+
+class InferenceBackend:
+    """Run a detection model on NCHW float32 batches."""
+
+    name = "base"
+    # Largest batch the loaded model accepts; 1 for models exported with a fixed batch dimension.
+    max_batch = 1
+
+    def __init__(self, model_path: Optional[str], input_size: Tuple[int, int], threads: int):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.model_path = model_path
+        self.input_size = input_size
+        self.threads = threads
+
+    def load(self) -> None:
+        """Load the model into memory."""
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class NullBackend(InferenceBackend):
+    """Placeholder used until a model is configured; returns no candidates."""
+
+    name = "none"
+    max_batch = 64
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        return np.zeros((batch.shape[0], 5, 0), dtype=np.float32)
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    name = "onnxruntime"
+
+    def load(self) -> None:
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(str(self.model_path), sess_options=options, providers=["CPUExecutionProvider"])
+        model_input = self._session.get_inputs()[0]
+        self._input_name = model_input.name
+        batch_dim = model_input.shape[0]
+        self.max_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else 64
+        height, width = model_input.shape[2], model_input.shape[3]
+        if isinstance(height, int) and isinstance(width, int):
+            self.input_size = (width, height)
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        return self._session.run(None, {self._input_name: batch})[0]
+
+
+class OpenCVDnnBackend(InferenceBackend):
+    name = "opencv"
+
+    def load(self) -> None:
+        cv2.setNumThreads(self.threads)
+        self._net = cv2.dnn.readNet(str(self.model_path))
+        self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        self._net.setInput(batch)
+        return self._net.forward()
+
+
+def create_backend(name: str, model_path: Optional[str], input_size: Tuple[int, int], threads: int) -> InferenceBackend:
+    """Pick a backend by name; `auto` prefers ONNX Runtime, then OpenCV DNN."""
+    name = (name or "auto").lower()
+    if not model_path:
+        return NullBackend(model_path, input_size, threads)
+    if name in ("auto", "onnxruntime") and ort is not None:
+        return OnnxRuntimeBackend(model_path, input_size, threads)
+    if name in ("auto", "opencv") and cv2 is not None:
+        return OpenCVDnnBackend(model_path, input_size, threads)
+    logging.getLogger(__name__).error("No inference runtime available for backend %s; running without a model", name)
+    return NullBackend(model_path, input_size, threads)
+
+
+def letterbox(image: np.ndarray, size: Tuple[int, int], out: np.ndarray) -> Tuple[float, int, int]:
+    """Resize `image` into `out` (H x W x 3 uint8) keeping aspect ratio; return scale and padding."""
+    target_w, target_h = size
+    height, width = image.shape[:2]
+    scale = min(target_w / width, target_h / height)
+    new_w, new_h = max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+    pad_x, pad_y = (target_w - new_w) // 2, (target_h - new_h) // 2
+    out[...] = 114
+    region = out[pad_y : pad_y + new_h, pad_x : pad_x + new_w]
+    if cv2 is not None:
+        cv2.resize(np.ascontiguousarray(image), (new_w, new_h), dst=region, interpolation=cv2.INTER_LINEAR)
+    else:
+        region[...] = np.asarray(Image.fromarray(np.ascontiguousarray(image)).resize((new_w, new_h), Image.BILINEAR))
+    return scale, pad_x, pad_y
 
 
 class InferenceEngine:
-    """Placeholder inference engine for future ML integration."""
+    """Detection model wrapper with lazy background loading and warm-up.
 
-    def __init__(self, model_path: str | None = None):
-        # TODO: load detection/classification model when available
-        print("Inference model placeholder initialized.")
+    Models are expected to emit YOLO-style output of shape (N, 4 + classes, anchors)
+    with centre/size boxes in input pixels and per-class scores.
+    """
+
+    def __init__(
+        self,
+        model_path: str | None = None,
+        backend: str = "auto",
+        threads: int = 4,
+        input_size: Sequence[int] = (640, 640),
+        threshold: float = 0.5,
+        species: Optional[Sequence[str]] = None,
+        max_candidates: int = 5000,
+        lazy: bool = True,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
         self.model_path = model_path
+        self.threshold = threshold
+        self.species = list(species or [])
+        self.max_candidates = max_candidates
+        if model_path and not Path(model_path).exists():
+            self.logger.error("Model file %s not found; running without a model", model_path)
+            model_path = None
+        self.backend = create_backend(backend, model_path, tuple(input_size), threads)
+        self._ready = threading.Event()
+        self._load_error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._input: Optional[np.ndarray] = None
+        self._canvas: Optional[np.ndarray] = None
+        if lazy:
+            threading.Thread(target=self._load, name="InferenceLoader", daemon=True).start()
+        else:
+            self._load()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        try:
+            self.backend.load()
+            self.warm_up()
+            self.logger.info(
+                "Inference backend %s ready in %.2fs (model=%s)", self.backend.name, time.perf_counter() - started, self.model_path
+            )
+        except Exception as exc:
+            self._load_error = exc
+            self.logger.exception("Failed to load model %s; falling back to no-op inference", self.model_path)
+            self.backend = NullBackend(None, self.backend.input_size, self.backend.threads)
+        finally:
+            self._ready.set()
+
+    def warm_up(self) -> None:
+        """Run one dummy batch so graph initialisation happens before the first capture."""
+        width, height = self.backend.input_size
+        self.backend.infer(np.zeros((1, 3, height, width), dtype=np.float32))
+
+    @property
+    def identity(self) -> str:
+        """String identifying the model and decode settings, used in cache keys."""
+        stamp = ""
+        if self.model_path and Path(self.model_path).exists():
+            stat = Path(self.model_path).stat()
+            stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+        return "|".join(
+            str(part)
+            for part in (self.backend.name, self.model_path, stamp, self.threshold, self.backend.input_size, self.max_candidates)
+        )
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _prepare(self, images: Sequence[np.ndarray]) -> Tuple[np.ndarray, List[Tuple[float, int, int]]]:
+        """Letterbox images into a reused NCHW float32 batch."""
+        width, height = self.backend.input_size
+        count = len(images)
+        if self._input is None or self._input.shape[0] < count or self._input.shape[2:] != (height, width):
+            self._input = np.empty((max(count, 1), 3, height, width), dtype=np.float32)
+            self._canvas = np.empty((height, width, 3), dtype=np.uint8)
+        batch = self._input[:count]
+        transforms = []
+        for idx, image in enumerate(images):
+            transforms.append(letterbox(image, (width, height), self._canvas))
+            np.multiply(self._canvas.transpose(2, 0, 1), np.float32(1.0 / 255.0), out=batch[idx])
+        return batch, transforms
+
+    def _decode(self, output: np.ndarray, transform: Tuple[float, int, int], shape: Tuple[int, ...]) -> Detections:
+        """Convert one (4 + classes, anchors) output into a detection batch in image pixels."""
+        if output.size == 0 or output.shape[0] <= 4:
+            return Detections.empty(self.species)
+        scores = output[4:]
+        class_ids = scores.argmax(axis=0)
+        confidences = scores[class_ids, np.arange(scores.shape[1])]
+        keep = np.flatnonzero(confidences >= self.threshold)
+        if keep.size > self.max_candidates:
+            keep = keep[np.argpartition(confidences[keep], -self.max_candidates)[-self.max_candidates :]]
+        if keep.size == 0:
+            return Detections.empty(self.species)
+        scale, pad_x, pad_y = transform
+        cx, cy, w, h = output[0, keep], output[1, keep], output[2, keep], output[3, keep]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        boxes -= (pad_x, pad_y, pad_x, pad_y)
+        boxes /= scale
+        height, width = shape[:2]
+        np.clip(boxes, 0, (width, height, width, height), out=boxes)
+        return Detections(boxes, confidences[keep], class_ids[keep], self.species)
+
+    def run_batch(self, images: Sequence[np.ndarray]) -> List[Dict[str, Any]]:
+        """Run detection on several RGB uint8 arrays; one result dict per image."""
+        self._ready.wait()
+        if isinstance(self.backend, NullBackend):
+            return [{"detections": Detections.empty(self.species), "counts": {}} for _ in images]
+        results: List[Dict[str, Any]] = []
+        with self._lock:
+            step = max(1, self.backend.max_batch)
+            for start in range(0, len(images), step):
+                chunk = images[start : start + step]
+                batch, transforms = self._prepare(chunk)
+                outputs = self.backend.infer(batch)
+                for idx, image in enumerate(chunk):
+                    detections = self._decode(outputs[idx], transforms[idx], image.shape)
+                    results.append({"detections": detections, "counts": {}})
+        return results
 
     def run(self, image) -> Dict[str, Any]:
-        """Return fake detections & counts structure."""
-        # TODO: replace with real detection outputs
-        return {"detections": [], "counts": {}}
+        """Run detection on one RGB uint8 array."""
+        return self.run_batch([image])[0]
@@ -2,64 +2,553 @@
 
 from __future__ import annotations
 
+import json
 import logging
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-from PIL import Image
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from core.aggregation import SpeciesAggregator
+from core.batching import BatchScheduler
+from core.cache import InferenceCache
 from core.capture import CameraManager
+from core.change import ChangeDetector
+from core.detections import Detections
+from core.frame import Frame
+from core.gating import FrameGate
+from core.illumination import IlluminationCalibration
 from core.inference import InferenceEngine
-from core.postprocessing import count_per_species, merge_bounding_boxes, non_max_suppression
+from core.metrics import MetricsExporter, PipelineMetrics
+from core.postprocessing import (
+    combine_tile_detections,
+    count_per_species,
+    merge_bounding_boxes,
+    non_max_suppression,
+)
+from core.parallel import PendingFrame, ProcessStageExecutor
+from core.pipeline import StagedPipeline
 from core.preprocessing import Preprocessor
+from core.settings import data_dir as settings_data_dir, database_path
+from core.tiling import Tile, generate_tiles, tile_rects
+from core.tracking import OrganismTracker
 from database.db import Database
 
 
+SPECIES_FILE = Path(__file__).resolve().parent.parent / "config" / "species_mapping.json"
+
+
+def load_species(path: Path = SPECIES_FILE) -> List[str]:
+    """Return the ordered species list used to name model class ids."""
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8") as file:
+        return json.load(file).get("species", [])
+
+
 class PipelineManager:
     """Coordinate image capture, preprocessing, inference, and result packaging."""
 
     def __init__(self, settings: Optional[Dict[str, Any]] = None):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.settings = settings or {}
-        data_dir = Path(self.settings.get("data_dir", Path(__file__).resolve().parent.parent / "data"))
-        self.camera = CameraManager(output_dir=data_dir / "images_raw")
-        self.preprocessor = Preprocessor()
-        self.inference_engine = InferenceEngine(model_path=self.settings.get("inference", {}).get("model_path"))
-        self.database = Database(db_path=Path(self.settings.get("database", {}).get("path", data_dir / "aqulens.db")))
+        data_dir = settings_data_dir(self.settings)
+        camera_settings = self.settings.get("camera", {})
+        self.acquisition_settings = self.settings.get("acquisition", {})
+        self.pipeline_settings = self.settings.get("pipeline", {})
+        metrics_settings = self.settings.get("metrics", {})
+        self.metrics = PipelineMetrics(
+            window=metrics_settings.get("window", 1024),
+            enabled=metrics_settings.get("enabled", True),
+        )
+        self.camera = CameraManager(
+            output_dir=data_dir / "images_raw",
+            resolution=camera_settings.get("resolution", (1280, 720)),
+            fps=camera_settings.get("fps"),
+            background_grabber=camera_settings.get("background_grabber", False),
+            buffer_size=camera_settings.get("buffer_size", 4),
+            storage=self.settings.get("storage", {}),
+            backend=camera_settings.get("backend", "auto"),
+            backend_options=camera_settings,
+            quality=self.settings.get("quality", {}),
+            metrics=self.metrics,
+        )
+        quality_settings = self.settings.get("quality", {})
+        self.gating_settings = self.settings.get("gating", {})
+        self.tiling_settings = self.settings.get("tiling", {})
+        change_settings = self.settings.get("change_detection", {})
+        self.change_detector: Optional[ChangeDetector] = None
+        if change_settings.get("enabled", False):
+            self.change_detector = ChangeDetector(
+                block_size=change_settings.get("block_size", 32),
+                threshold=change_settings.get("threshold", 4.0),
+            )
+        self.change_stats = {"inferred": 0, "reused": 0}
+        self._region_detections: Dict[int, Detections] = {}
+        self._region_shape: Optional[tuple] = None
+        self.gate = FrameGate(
+            min_sharpness=self.gating_settings.get("min_sharpness", quality_settings.get("min_sharpness", 50.0)),
+            duplicate_distance=self.gating_settings.get("duplicate_distance", 4),
+            enabled=self.gating_settings.get("enabled", True),
+        )
+        preprocessing_settings = self.settings.get("preprocessing", {})
+        self.preprocessor = Preprocessor(settings=preprocessing_settings)
+        parallel_settings = self.settings.get("parallel", {})
+        self.process_pool: Optional[ProcessStageExecutor] = None
+        if parallel_settings.get("enabled", False):
+            self.process_pool = ProcessStageExecutor(
+                preprocessing_settings,
+                processes=parallel_settings.get("processes"),
+                max_buffers=parallel_settings.get("max_buffers", 8),
+                start_method=parallel_settings.get("start_method"),
+            )
+        inference_settings = self.settings.get("inference", {})
+        self.inference_engine = InferenceEngine(
+            model_path=inference_settings.get("model_path"),
+            backend=inference_settings.get("backend", "auto"),
+            threads=inference_settings.get("threads", 4),
+            input_size=inference_settings.get("input_size", (640, 640)),
+            threshold=inference_settings.get("threshold", 0.5),
+            species=load_species(),
+            max_candidates=inference_settings.get("max_candidates", 5000),
+        )
+        cache_settings = self.settings.get("cache", {})
+        self.cache: Optional[InferenceCache] = None
+        if cache_settings.get("enabled", False):
+            self.cache = InferenceCache(
+                max_entries=cache_settings.get("max_entries", 256),
+                disk_dir=cache_settings.get("disk_dir"),
+            )
+        batching_settings = inference_settings.get("batching", {})
+        self.batch_scheduler: Optional[BatchScheduler] = None
+        if batching_settings.get("enabled", False):
+            self.batch_scheduler = BatchScheduler(
+                self.inference_engine,
+                max_batch=batching_settings.get("max_batch", 8),
+                max_delay=batching_settings.get("max_delay_ms", 10) / 1000.0,
+            )
+        tracking_settings = self.settings.get("tracking", {})
+        self.tracker: Optional[OrganismTracker] = None
+        if tracking_settings.get("enabled", False):
+            self.tracker = OrganismTracker(
+                min_iou=tracking_settings.get("min_iou", 0.1),
+                max_distance=tracking_settings.get("max_distance", 40.0),
+                min_hits=tracking_settings.get("min_hits", 2),
+                max_missed=tracking_settings.get("max_missed", 5),
+                names=self.inference_engine.species,
+            )
+        self.aggregator = SpeciesAggregator(
+            bins=self.settings.get("postprocessing", {}).get("confidence_histogram_bins", 10),
+            names=self.inference_engine.species,
+        )
+        self.metrics.add_gauge("storage", lambda: self.camera.storage_pending)
+        if self.batch_scheduler is not None:
+            self.metrics.add_gauge("batching", lambda: self.batch_scheduler.pending)
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        if self.metrics.enabled and metrics_settings.get("file"):
+            self.metrics_exporter = MetricsExporter(
+                self.metrics,
+                data_dir / metrics_settings["file"],
+                interval=metrics_settings.get("interval", 10.0),
+                fmt=metrics_settings.get("format", "jsonl"),
+            )
+        self.database = Database(db_path=database_path(self.settings))
+        self.illumination = IlluminationCalibration(self.database, factor=preprocessing_settings.get("flat_field_factor", 8))
+        self.illumination.load_all()
+        self.preset: Optional[str] = None
+        self.set_preset(preprocessing_settings.get("default_preset", "Surface"))
         self.logger.info("PipelineManager initialized")
 
     def capture_and_process(self) -> Dict[str, Any]:
         """Capture image, preprocess, run inference, and postprocess results."""
-        image = self.camera.capture_image()
-        if image is None:
+        frame = self.camera.capture_image()
+        if frame is None:
             self.logger.error("Capture failed; no image to process")
             return {}
+        # Operator-triggered captures bypass gating unless configured otherwise.
+        return self.process_frame(frame, gate=self.gating_settings.get("manual_capture", False))
+
+    def capture_burst(self, count: Optional[int] = None, fps: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Capture a burst of frames and process each of them."""
+        count = count or self.acquisition_settings.get("burst_count", 10)
+        if self.pipeline_settings.get("staged", False):
+            pipeline = self._staged_pipeline()
+            frames = self.camera.iter_frames(count=count, interval=1.0 / fps if fps else None, stop_event=pipeline.stop_event)
+            return list(pipeline.run(frames))
+        results = [self.process_frame(frame) for frame in self.camera.capture_burst(count, fps=fps)]
+        return [result for result in results if not result.get("rejected")]
+
+    def run_timelapse(
+        self,
+        interval: Optional[float] = None,
+        count: Optional[int] = None,
+        duration: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+        sample_metadata: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield processed results for a scheduled time-lapse run.
+
+        With `sample_metadata`, the run is saved as one sample, created at the
+        first accepted frame, and every accepted frame's image and detections
+        are attached to it.
+        """
+        interval = interval or self.acquisition_settings.get("timelapse_interval", 5.0)
+        if self.pipeline_settings.get("staged", False):
+            pipeline = self._staged_pipeline(sample_metadata=sample_metadata)
+            frames = self.camera.capture_timelapse(
+                interval, count=count, duration=duration, stop_event=stop_event or pipeline.stop_event
+            )
+            yield from pipeline.run(frames)
+            return
+        sample_id = None
+        for frame in self.camera.capture_timelapse(interval, count=count, duration=duration, stop_event=stop_event):
+            result = self.process_frame(frame)
+            if not result.get("rejected"):
+                if sample_metadata is not None:
+                    if sample_id is None:
+                        sample_id = self.start_sample(sample_metadata, result)
+                    self.save_frame(sample_id, result)
+                yield result
+
+    def run_pipelined(
+        self, frames: Iterable[Frame], gate: bool = True, sample_metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Process any frame source through overlapped stages, yielding accepted results in order."""
+        return self._staged_pipeline(gate=gate, sample_metadata=sample_metadata).run(frames)
+
+    def _staged_pipeline(self, gate: bool = True, sample_metadata: Optional[Dict[str, Any]] = None) -> StagedPipeline:
+        return StagedPipeline(
+            self,
+            queue_size=self.pipeline_settings.get("queue_size", 2),
+            gate=gate,
+            sample_metadata=sample_metadata,
+            policy=self.pipeline_settings.get("backpressure", "block"),
+            keep_every=self.pipeline_settings.get("keep_every", 2),
+        )
+
+    def process_frame(self, frame: Frame, gate: bool = True) -> Dict[str, Any]:
+        """Preprocess, run inference on, and postprocess an already captured frame.
+
+        When gating is active, blurry or near-duplicate frames skip the rest of
+        the pipeline and come back with a `rejected` reason and no detections.
+        """
+        started = time.perf_counter()
+        if gate:
+            rejected = self._gate_frame(frame)
+            if rejected is not None:
+                return rejected
+        processed = self._preprocess(frame)
+        result = self._postprocess(frame, processed, self._detect(processed.array))
+        self.metrics.record("total", time.perf_counter() - started)
+        return result
+
+    def process_frames(self, frames: Iterable[Frame], gate: bool = True, preprocess: bool = True) -> List[Dict[str, Any]]:
+        """Process several frames, queueing inference for all of them before waiting on any.
+
+        With batching enabled the frames share engine batches; otherwise this
+        is equivalent to calling `process_frame` on each in turn. Pass
+        `preprocess=False` for frames that were already preprocessed, such
+        as images stored by an earlier run.
+        """
+        started = time.perf_counter()
+        staged = []
+        for frame in frames:
+            rejected = self._gate_frame(frame) if gate else None
+            if rejected is not None:
+                staged.append((frame, None, rejected))
+            else:
+                staged.append((frame, self._preprocess(frame) if preprocess else frame, None))
+        accepted = [idx for idx, (_, processed, _) in enumerate(staged) if processed is not None]
+        pending = {
+            idx: self._submit_detection(staged[idx][1].array, flush=idx == accepted[-1]) for idx in accepted
+        }
+        results = []
+        for idx, (frame, processed, rejected) in enumerate(staged):
+            if rejected is not None:
+                results.append(rejected)
+                continue
+            results.append(self._postprocess(frame, processed, pending[idx]()))
+            self.metrics.record("total", time.perf_counter() - started)
+        return results
+
+    def pipeline_metrics(self) -> Dict[str, Any]:
+        """Current per-stage latency percentiles, frame rates and queue depths."""
+        return self.metrics.snapshot()
+
+    def _gate_frame(self, frame: Frame) -> Optional[Dict[str, Any]]:
+        """Return a rejected result for blurry or near-duplicate frames, else None."""
+        with self.metrics.timer("gate"):
+            reason = self.gate.evaluate(frame.array, metrics=self.camera.quality_metrics(frame))
+        if not reason:
+            return None
+        self.logger.debug("Frame %s rejected (%s)", frame.sequence, reason)
+        self.metrics.tick("rejected")
+        return {
+            "timestamp": datetime.utcnow().isoformat(),
+            "frame_timestamp": frame.timestamp,
+            "sequence": frame.sequence,
+            "rejected": reason,
+            "detections": Detections.empty(self.inference_engine.species),
+            "counts": {},
+            "image": frame,
+        }
+
+    def _preprocess(self, frame: Frame) -> Frame:
+        with self.metrics.timer("preprocess"):
+            if self.process_pool is not None and self.preprocessor.active:
+                return frame.with_array(self.process_pool.preprocess(frame.array))
+            return frame.with_array(self.preprocessor.apply(frame.array))
+
+    def _submit_preprocess(self, frame: Frame) -> Optional[PendingFrame]:
+        """Start preprocessing in the process pool; None when it must run inline."""
+        if self.process_pool is None or not self.preprocessor.active:
+            return None
+        return self.process_pool.submit_preprocess(frame.array)
 
-        processed = self.preprocessor.apply(image)
-        inference_output = self.inference_engine.run(processed)
-        detections = inference_output.get("detections", [])
+    def _suppress(self, detections: Detections, shape: Tuple[int, ...]) -> Detections:
+        """Per-class NMS, then merging of duplicates across tile seams when the frame was tiled."""
+        inference_settings = self.settings.get("inference", {})
+        postprocessing_settings = self.settings.get("postprocessing", {})
+        nms = {
+            "threshold": inference_settings.get("nms_threshold", 0.4),
+            "method": inference_settings.get("nms_method", "hard"),
+            "sigma": inference_settings.get("soft_nms_sigma", 0.5),
+            "score_threshold": inference_settings.get("soft_nms_min_score", 0.001),
+        }
+        merge = None
+        if self.tiling_settings.get("enabled", False):
+            merge = {
+                "tile_rects": tile_rects(
+                    shape[0],
+                    shape[1],
+                    self.tiling_settings.get("tile_size", 640),
+                    self.tiling_settings.get("overlap", 64),
+                ),
+                "iou_threshold": postprocessing_settings.get("merge_iou_threshold", 0.5),
+                "containment_threshold": postprocessing_settings.get("merge_containment_threshold", 0.8),
+                "method": postprocessing_settings.get("merge_method", "union"),
+                "min_iou": nms["threshold"],
+            }
+        if self.process_pool is not None:
+            with self.metrics.timer("suppress"):
+                return self.process_pool.suppress(detections, nms, merge)
+        with self.metrics.timer("nms"):
+            detections = non_max_suppression(detections, **nms)
+        if merge is None:
+            return detections
+        with self.metrics.timer("merge"):
+            return merge_bounding_boxes(detections, **merge)
 
-        detections = non_max_suppression(detections, threshold=self.settings.get("inference", {}).get("nms_threshold", 0.4))
-        detections = merge_bounding_boxes(detections)
-        counts = count_per_species(detections)
+    def _postprocess(self, frame: Frame, processed: Frame, detections: Detections) -> Dict[str, Any]:
+        """Suppress, merge, track and count detections and package the result."""
+        detections = self._suppress(detections, processed.array.shape)
+        track_ids = None
+        with self.metrics.timer("count"):
+            if self.tracker is not None:
+                # Counts become unique organisms; each enters the session statistics once, when confirmed.
+                track_ids, confirmed_now = self.tracker.update(detections)
+                self.aggregator.update(detections[confirmed_now])
+                counts = self.tracker.unique_counts()
+            else:
+                counts = count_per_species(detections)
+                self.aggregator.update(detections)
+        self.metrics.tick("processed")
 
         result = {
             "timestamp": datetime.utcnow().isoformat(),
+            "frame_timestamp": frame.timestamp,
+            "sequence": frame.sequence,
             "detections": detections,
             "counts": counts,
+            "track_ids": track_ids,
+            "summary": self.aggregator.summary(),
             "image": processed,
         }
         self.logger.debug("Pipeline result: %s", result)
         return result
 
+    def start_session(self) -> None:
+        """Begin a new sample session, clearing the running species statistics."""
+        self.aggregator.reset()
+        if self.tracker is not None:
+            self.tracker.reset()
+        self.logger.info("Started new sample session")
+
+    def set_preset(self, preset: str) -> None:
+        """Select a capture preset and apply its cached flat-field model."""
+        self.preset = preset
+        gain = self.illumination.get(preset)
+        self._apply_flat_field(gain)
+        if gain is None and self.preprocessor.enable_illumination_correction:
+            self.logger.warning("No flat-field model for preset %s; illumination correction inactive", preset)
+        self.logger.info("Preset set to %s", preset)
+
+    def calibrate_flat_field(self, preset: Optional[str] = None, frames: Optional[int] = None) -> bool:
+        """Capture blank frames, build the preset's flat-field model and store it."""
+        preset = preset or self.preset
+        count = frames or self.settings.get("preprocessing", {}).get("flat_field_frames", 16)
+        captured = self.camera.capture_burst(count, store=False)
+        if not captured:
+            self.logger.error("Flat-field calibration failed; no frames captured")
+            return False
+        self.illumination.calibrate(preset, (frame.array for frame in captured))
+        if preset == self.preset:
+            self._apply_flat_field(self.illumination.get(preset))
+        return True
+
+    def _apply_flat_field(self, gain) -> None:
+        self.preprocessor.set_flat_field(gain)
+        if self.process_pool is not None:
+            self.process_pool.set_flat_field(gain)
+
+    def _infer(self, images: List[Any]) -> List[Dict[str, Any]]:
+        """Run inference through the batch scheduler when enabled, else directly."""
+        if self.batch_scheduler is not None:
+            return [future.result() for future in self.batch_scheduler.submit_many(images, flush=True)]
+        return self.inference_engine.run_batch(images)
+
+    def _detect(self, array) -> Detections:
+        """Return detections for a preprocessed frame, consulting the result cache first."""
+        with self.metrics.timer("inference"):
+            return self._cached_detection(array)
+
+    def _submit_detection(self, array, flush: bool = True) -> Callable[[], Detections]:
+        """Queue inference for a preprocessed frame and return a callable that waits for its detections.
+
+        Without the batch scheduler, or with change detection (whose region
+        state needs each result before the next frame), inference runs now.
+        Otherwise the frame's images are queued so that frames submitted
+        back to back share batches; `flush` dispatches without the batching
+        delay once no further frames are about to follow.
+        """
+        if self.batch_scheduler is None or self.change_detector is not None:
+            detections = self._detect(array)
+            return lambda: detections
+        started = time.perf_counter()
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(array)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.metrics.record("inference", time.perf_counter() - started)
+                return lambda: cached
+        tiles = self._tiles(array) if self.tiling_settings.get("enabled", False) else None
+        images = [tile.array for tile in tiles] if tiles is not None else [array]
+        futures = self.batch_scheduler.submit_many(images, flush=flush)
+
+        def resolve() -> Detections:
+            outputs = [future.result() for future in futures]
+            if tiles is None:
+                detections = outputs[0]["detections"]
+            else:
+                detections = combine_tile_detections((tile, output["detections"]) for tile, output in zip(tiles, outputs))
+            if key is not None:
+                self.cache.put(key, detections)
+            self.metrics.record("inference", time.perf_counter() - started)
+            return detections
+
+        return resolve
+
+    def _cache_key(self, array) -> str:
+        identity = f"{self.inference_engine.identity}|{sorted(self.tiling_settings.items())}"
+        return self.cache.make_key(array, identity)
+
+    def _cached_detection(self, array) -> Detections:
+        if self.cache is None:
+            return self._run_detection(array)
+        key = self._cache_key(array)
+        detections = self.cache.get(key)
+        if detections is None:
+            detections = self._run_detection(array)
+            self.cache.put(key, detections)
+        return detections
+
+    def _run_detection(self, array) -> Detections:
+        """Run inference on the whole frame or on overlapping tiles."""
+        if self.change_detector is not None:
+            return self._run_changed_detection(array)
+        if not self.tiling_settings.get("enabled", False):
+            return self._infer([array])[0]["detections"]
+        tiles = self._tiles(array)
+        outputs = self._infer([tile.array for tile in tiles])
+        return combine_tile_detections((tile, output["detections"]) for tile, output in zip(tiles, outputs))
+
+    def _tiles(self, array) -> List[Tile]:
+        return generate_tiles(
+            array,
+            tile_size=self.tiling_settings.get("tile_size", 640),
+            overlap=self.tiling_settings.get("overlap", 64),
+        )
+
+    def _run_changed_detection(self, array) -> Detections:
+        """Re-run inference only where the field changed, reusing detections elsewhere."""
+        mask = self.change_detector.changed(array)
+        if not self.tiling_settings.get("enabled", False):
+            if mask is not None and not mask.any() and self._region_detections.get(0) is not None:
+                self.change_stats["reused"] += 1
+                return self._region_detections[0]
+            detections = self._infer([array])[0]["detections"]
+            self.change_detector.accept()
+            self._region_detections = {0: detections}
+            self.change_stats["inferred"] += 1
+            return detections
+
+        tiles = self._tiles(array)
+        if mask is None or self._region_shape != array.shape[:2]:
+            self._region_detections = {}
+            self._region_shape = array.shape[:2]
+        pending = [
+            tile
+            for tile in tiles
+            if mask is None
+            or tile.index not in self._region_detections
+            or self.change_detector.region_changed(mask, tile.x, tile.y, tile.width, tile.height)
+        ]
+        outputs = self._infer([tile.array for tile in pending]) if pending else []
+        for tile, output in zip(pending, outputs):
+            self._region_detections[tile.index] = tile.to_frame(output["detections"])
+            self.change_detector.accept(tile.x, tile.y, tile.width, tile.height)
+        self.change_stats["inferred"] += len(pending)
+        self.change_stats["reused"] += len(tiles) - len(pending)
+        return Detections.concat(
+            (self._region_detections.get(tile.index, Detections.empty()) for tile in tiles),
+            names=self.inference_engine.species,
+        )
+
     def save_results(self, sample_metadata: Dict[str, Any], results: Dict[str, Any]) -> None:
         """Persist sample, image, and detection metadata to SQLite."""
-        image: Optional[Image.Image] = results.get("image")
         sample_id = self.database.insert_sample(sample_metadata)
-        image_id = None
-        if image:
-            image_id = self.database.insert_image(sample_id=sample_id, image=image)
-        for detection in results.get("detections", []):
-            self.database.insert_detection(sample_id=sample_id, image_id=image_id, detection=detection)
+        self.save_frame(sample_id, results)
         self.logger.info("Results saved for sample %s", sample_id)
+
+    def start_sample(self, sample_metadata: Dict[str, Any], first_result: Dict[str, Any]) -> int:
+        """Insert the sample a multi-frame run is saved under, timestamped at its first frame by default."""
+        sample_id = self.database.insert_sample({"timestamp": first_result["timestamp"], **sample_metadata})
+        self.logger.info("Recording run as sample %s", sample_id)
+        return sample_id
+
+    def save_frame(self, sample_id: int, results: Dict[str, Any]) -> None:
+        """Attach one frame's image and detections to an existing sample."""
+        started = time.perf_counter()
+        frame: Optional[Frame] = results.get("image")
+        image_id = None
+        if frame is not None:
+            # Frames of one run share a sample, so name images by sequence rather than by second.
+            filename = f"sample_{sample_id}_{frame.sequence:06d}.jpg" if frame.sequence else None
+            image_id = self.database.insert_image(sample_id=sample_id, image=frame.to_pil(), filename=filename)
+        detections: Optional[Detections] = results.get("detections")
+        if detections is not None and len(detections):
+            self.database.insert_detections(sample_id=sample_id, image_id=image_id, detections=detections)
+        self.metrics.record("save", time.perf_counter() - started)
+
+    def shutdown(self) -> None:
+        """Stop camera acquisition and release hardware resources."""
+        self.camera.stop_preview()
+        if self.batch_scheduler is not None:
+            self.batch_scheduler.close()
+        if self.process_pool is not None:
+            self.process_pool.close()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.close()
+        self.logger.info("PipelineManager shut down")
@@ -0,0 +1,224 @@
+"""Per-stage latency, frame-rate and queue-depth instrumentation."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+
+class LatencyWindow:
+    """Fixed-size ring of recent durations (seconds) with on-demand percentiles."""
+
+    def __init__(self, size: int = 1024):
+        self._values = np.zeros(max(1, int(size)), dtype=np.float64)
+        self._next = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self._values[self._next] = seconds
+        self._next = (self._next + 1) % len(self._values)
+        self.count += 1
+        self.total += seconds
+
+    def summary(self) -> Dict[str, float]:
+        filled = self._values[: min(self.count, len(self._values))]
+        if not len(filled):
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(filled, (50, 95, 99))
+        return {
+            "count": self.count,
+            "sum_s": self.total,
+            "mean_ms": float(filled.mean()) * 1000,
+            "p50_ms": float(p50) * 1000,
+            "p95_ms": float(p95) * 1000,
+            "p99_ms": float(p99) * 1000,
+            "max_ms": float(filled.max()) * 1000,
+        }
+
+
+class RateMeter:
+    """Events per second over a sliding time window."""
+
+    def __init__(self, window: float = 5.0):
+        self.window = float(window)
+        self.count = 0
+        self._stamps: deque = deque()
+        self._lock = threading.Lock()
+
+    def tick(self, events: int = 1) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.count += events
+            for _ in range(events):
+                self._stamps.append(now)
+            self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._stamps and now - self._stamps[0] > self.window:
+            self._stamps.popleft()
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if len(self._stamps) < 2:
+                return 0.0
+            span = now - self._stamps[0]
+            return (len(self._stamps) - 1) / span if span > 0 else 0.0
+
+
+class PipelineMetrics:
+    """Thread-safe registry of stage timers, rate meters and queue-depth gauges."""
+
+    def __init__(self, window: int = 1024, enabled: bool = True):
+        self.window = window
+        self.enabled = enabled
+        self.started = time.time()
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self._rates: Dict[str, RateMeter] = {}
+        self._gauges: Dict[str, Callable[[], Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            window = self._latencies.get(stage)
+            if window is None:
+                window = self._latencies[stage] = LatencyWindow(self.window)
+            window.add(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one sample of `stage`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def rate(self, name: str) -> RateMeter:
+        """Return the named rate meter, creating it on first use."""
+        with self._lock:
+            meter = self._rates.get(name)
+            if meter is None:
+                meter = self._rates[name] = RateMeter()
+            return meter
+
+    def tick(self, name: str, events: int = 1) -> None:
+        if self.enabled:
+            self.rate(name).tick(events)
+
+    def add_gauge(self, name: str, read: Callable[[], Optional[float]]) -> None:
+        """Register a callable sampled at snapshot time, e.g. a queue's qsize."""
+        with self._lock:
+            self._gauges[name] = read
+
+    def remove_gauge(self, name: str) -> None:
+        with self._lock:
+            self._gauges.pop(name, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = {stage: window.summary() for stage, window in self._latencies.items()}
+            rates = dict(self._rates)
+            gauges = dict(self._gauges)
+        queues = {}
+        for name, read in gauges.items():
+            try:
+                value = read()
+            except Exception:
+                value = None
+            if value is not None:
+                queues[name] = value
+        return {
+            "timestamp": time.time(),
+            "uptime_s": time.time() - self.started,
+            "stages": latencies,
+            "fps": {name: meter.rate() for name, meter in rates.items()},
+            "frames": {name: meter.count for name, meter in rates.items()},
+            "queues": queues,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+            for meter in self._rates.values():
+                with meter._lock:
+                    meter._stamps.clear()
+                    meter.count = 0
+
+
+def to_prometheus(snapshot: Dict[str, Any], prefix: str = "aqualens") -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines = [
+        f"# TYPE {prefix}_stage_latency_seconds summary",
+    ]
+    for stage, stats in sorted(snapshot["stages"].items()):
+        if not stats.get("count"):
+            continue
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            lines.append(f'{prefix}_stage_latency_seconds{{stage="{stage}",quantile="{quantile}"}} {stats[key] / 1000:.6f}')
+        lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{stage}"}} {stats["sum_s"]:.6f}')
+        lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{stage}"}} {stats["count"]}')
+    lines.append(f"# TYPE {prefix}_fps gauge")
+    for name, value in sorted(snapshot["fps"].items()):
+        lines.append(f'{prefix}_fps{{stream="{name}"}} {value:.3f}')
+    lines.append(f"# TYPE {prefix}_frames_total counter")
+    for name, value in sorted(snapshot["frames"].items()):
+        lines.append(f'{prefix}_frames_total{{stream="{name}"}} {value}')
+    lines.append(f"# TYPE {prefix}_queue_depth gauge")
+    for name, value in sorted(snapshot["queues"].items()):
+        lines.append(f'{prefix}_queue_depth{{queue="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Periodically write metrics snapshots to a file.
+
+    `jsonl` appends one JSON object per interval; `prometheus` atomically
+    replaces the file, suitable for a node_exporter textfile collector.
+    """
+
+    def __init__(self, metrics: PipelineMetrics, path: Path, interval: float = 10.0, fmt: str = "jsonl"):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.metrics = metrics
+        self.path = Path(path)
+        self.interval = max(0.5, float(interval))
+        self.fmt = fmt
+        self._stop = threading.Event()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="MetricsExporter", daemon=True)
+        self._thread.start()
+
+    def write(self) -> None:
+        snapshot = self.metrics.snapshot()
+        try:
+            if self.fmt == "prometheus":
+                tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+                tmp_path.write_text(to_prometheus(snapshot), encoding="utf-8")
+                os.replace(tmp_path, self.path)
+            else:
+                with self.path.open("a", encoding="utf-8") as file:
+                    file.write(json.dumps(snapshot) + "\n")
+        except OSError:
+            self.logger.exception("Failed to write metrics to %s", self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.write()
@@ -0,0 +1,276 @@
+"""Process-pool execution of CPU-heavy stages with frames in shared memory."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.detections import Detections
+from core.postprocessing import merge_bounding_boxes, non_max_suppression
+from core.preprocessing import Preprocessor
+
+
+def _attach_block(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block created by the parent.
+
+    Workers share the parent's resource tracker (see ProcessStageExecutor),
+    where re-registering a name is a no-op, so the parent's registration
+    stays the only one and still covers cleanup if the parent crashes.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no `track` argument
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFramePool:
+    """Pool of shared-memory frame buffers, reused once nothing references them.
+
+    Mirrors FramePool: a buffer is free when the pool holds the only
+    reference to its array. Workers receive only the block name, so pixel
+    data is never pickled. `acquire` returns None when every buffer is busy.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype=np.uint8, max_buffers: int = 8):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.max_buffers = max(1, int(max_buffers))
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self._arrays: List[np.ndarray] = []
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        probe = [np.empty(0)]
+        for buf in probe:
+            self._free_refcount = sys.getrefcount(buf)
+
+    def acquire(self) -> Optional[np.ndarray]:
+        with self._lock:
+            for array in self._arrays:
+                if sys.getrefcount(array) <= self._free_refcount:
+                    return array
+            if len(self._arrays) >= self.max_buffers:
+                return None
+            size = int(np.prod(self.shape)) * self.dtype.itemsize
+            block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            array = np.ndarray(self.shape, dtype=self.dtype, buffer=block.buf)
+            self._blocks.append(block)
+            self._arrays.append(array)
+            self._names[id(array)] = block.name
+            return array
+
+    def name_of(self, array: np.ndarray) -> str:
+        return self._names[id(array)]
+
+    def close(self) -> None:
+        with self._lock:
+            self._arrays.clear()
+            self._names.clear()
+            for block in self._blocks:
+                try:
+                    block.unlink()
+                    block.close()
+                except (BufferError, FileNotFoundError):
+                    # Frames still referencing the block keep its mapping alive.
+                    pass
+            self._blocks.clear()
+
+
+# Per-worker state, populated by _init_worker in each pool process.
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(preprocessing_settings: Dict[str, Any]) -> None:
+    _worker["preprocessor"] = Preprocessor(preprocessing_settings)
+    _worker["blocks"] = {}
+    _worker["flat"] = None
+
+
+def _worker_array(name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+    blocks = _worker["blocks"]
+    if name not in blocks:
+        blocks[name] = _attach_block(name)
+    return np.ndarray(shape, dtype=dtype, buffer=blocks[name].buf)
+
+
+def _preprocess_task(source: str, target: str, shape: Tuple[int, ...], flat: Optional[Tuple[str, Tuple[int, ...]]]) -> None:
+    preprocessor: Preprocessor = _worker["preprocessor"]
+    if flat != _worker["flat"]:
+        previous = _worker["flat"]
+        preprocessor.set_flat_field(None if flat is None else _worker_array(flat[0], flat[1], np.float32))
+        _worker["flat"] = flat
+        if previous is not None:
+            # The parent frees superseded maps once no task names them; drop this worker's mapping too.
+            try:
+                _worker["blocks"].pop(previous[0]).close()
+            except BufferError:
+                pass
+    src = _worker_array(source, shape, np.uint8)
+    np.copyto(_worker_array(target, shape, np.uint8), preprocessor.apply(src))
+
+
+def _suppress_task(detections: Detections, nms: Dict[str, Any], merge: Optional[Dict[str, Any]]) -> Detections:
+    detections = non_max_suppression(detections, **nms)
+    return detections if merge is None else merge_bounding_boxes(detections, **merge)
+
+
+class PendingFrame:
+    """Handle for a frame being preprocessed in the pool."""
+
+    def __init__(self, async_result, source: np.ndarray, target: np.ndarray):
+        self._async_result = async_result
+        self._source: Optional[np.ndarray] = source
+        self._target = target
+
+    def result(self, timeout: Optional[float] = None) -> np.ndarray:
+        """Wait for the worker and return the preprocessed array (a shared-memory view)."""
+        self._async_result.get(timeout)
+        # Dropping the input reference hands its buffer back to the pool.
+        self._source = None
+        return self._target
+
+    def discard(self) -> None:
+        """Wait for the worker without raising, then hand both buffers back to the pool.
+
+        A dropped frame must not release its buffers while a worker may still
+        be writing into them, or the next frame could be handed the same block.
+        """
+        self._async_result.wait()
+        self._source = None
+        self._target = None
+
+
+class ProcessStageExecutor:
+    """Run preprocessing and NMS/merging in a multiprocessing pool.
+
+    Frames are copied once into a shared-memory input buffer; workers attach
+    to input and output blocks by name and write the preprocessed frame in
+    place, so only names and shapes cross the process boundary. The
+    flat-field map lives in shared memory as well; a superseded map is freed
+    once no queued task names it. When all shared buffers are in use the
+    frame is processed in the calling process instead.
+    """
+
+    def __init__(
+        self,
+        preprocessing_settings: Optional[Dict[str, Any]] = None,
+        processes: Optional[int] = None,
+        max_buffers: int = 8,
+        start_method: Optional[str] = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.preprocessing_settings = preprocessing_settings or {}
+        self.processes = max(1, int(processes or (os.cpu_count() or 2) - 1))
+        self.max_buffers = max(2, int(max_buffers))
+        self.fallbacks = 0
+        self._local = Preprocessor(self.preprocessing_settings)
+        self._pools: Dict[Tuple[int, ...], SharedFramePool] = {}
+        self._flat_blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self._flat_users: Dict[str, int] = {}
+        self._flat: Optional[Tuple[str, Tuple[int, ...]]] = None
+        self._lock = threading.Lock()
+        context = multiprocessing.get_context(start_method)
+        if os.name == "posix":
+            # Start the tracker before the workers so forked and spawned workers share it instead of
+            # each starting their own, which would report the parent's blocks as leaked.
+            resource_tracker.ensure_running()
+        self._pool = context.Pool(self.processes, initializer=_init_worker, initargs=(self.preprocessing_settings,))
+        self.logger.info("Process pool started with %s workers (%s)", self.processes, context.get_start_method())
+
+    def set_flat_field(self, gain: Optional[np.ndarray]) -> None:
+        """Publish a new flat-field map to the workers (and the local fallback)."""
+        self._local.set_flat_field(gain)
+        flat = None
+        if gain is not None:
+            gain = np.ascontiguousarray(gain, dtype=np.float32)
+            block = shared_memory.SharedMemory(create=True, size=max(gain.nbytes, 1))
+            np.ndarray(gain.shape, dtype=np.float32, buffer=block.buf)[...] = gain
+            flat = (block.name, gain.shape)
+        with self._lock:
+            previous, self._flat = self._flat, flat
+            if flat is not None:
+                self._flat_blocks[flat[0]] = block
+                self._flat_users[flat[0]] = 0
+            if previous is not None:
+                self._release_flat(previous[0])
+
+    def _release_flat(self, name: str) -> None:
+        """Free a superseded flat-field block once no queued task names it; call with the lock held."""
+        if self._flat is not None and self._flat[0] == name:
+            return
+        if self._flat_users.get(name, 0) == 0 and name in self._flat_blocks:
+            del self._flat_users[name]
+            block = self._flat_blocks.pop(name)
+            block.close()
+            block.unlink()
+
+    def _flat_task_done(self, name: str) -> None:
+        with self._lock:
+            self._flat_users[name] -= 1
+            self._release_flat(name)
+
+    def _buffers(self, shape: Tuple[int, ...]) -> SharedFramePool:
+        with self._lock:
+            pool = self._pools.get(shape)
+            if pool is None:
+                pool = self._pools[shape] = SharedFramePool(shape, max_buffers=self.max_buffers)
+            return pool
+
+    def submit_preprocess(self, array: np.ndarray) -> Optional[PendingFrame]:
+        """Queue one uint8 frame; None when no shared buffers are free."""
+        pool = self._buffers(array.shape)
+        source = pool.acquire()
+        target = pool.acquire() if source is not None else None
+        if target is None:
+            return None
+        np.copyto(source, array)
+        with self._lock:
+            flat = self._flat
+            if flat is not None:
+                self._flat_users[flat[0]] += 1
+        done = None
+        if flat is not None:
+
+            def done(_, name=flat[0]):
+                self._flat_task_done(name)
+
+        async_result = self._pool.apply_async(
+            _preprocess_task,
+            (pool.name_of(source), pool.name_of(target), array.shape, flat),
+            callback=done,
+            error_callback=done,
+        )
+        return PendingFrame(async_result, source, target)
+
+    def preprocess(self, array: np.ndarray) -> np.ndarray:
+        pending = self.submit_preprocess(array)
+        if pending is None:
+            self.fallbacks += 1
+            self.logger.debug("Shared frame buffers exhausted; preprocessing in-process")
+            return self._local.apply(array)
+        return pending.result()
+
+    def suppress(self, detections: Detections, nms: Dict[str, Any], merge: Optional[Dict[str, Any]]) -> Detections:
+        """NMS followed, when `merge` is given, by tile-seam box merging in a worker."""
+        if len(detections) < 2:
+            return detections
+        return self._pool.apply(_suppress_task, (detections, nms, merge))
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
+        for pool in self._pools.values():
+            pool.close()
+        for block in self._flat_blocks.values():
+            block.close()
+            block.unlink()
+        self._flat_blocks.clear()
+        self._flat_users.clear()
+        self._flat = None
+        self.logger.info("Process pool closed (%s in-process fallbacks)", self.fallbacks)
@@ -0,0 +1,219 @@
+"""Overlapped multi-stage execution of the processing pipeline."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from core.backpressure import BLOCK, SheddingQueue
+from core.detections import Detections
+from core.frame import Frame
+
+if TYPE_CHECKING:
+    from core.manager import PipelineManager
+    from core.parallel import PendingFrame
+
+_END = object()
+SHED_LOG_INTERVAL = 10.0
+
+
+@dataclass
+class _Job:
+    """One frame's progress through the stages."""
+
+    frame: Frame
+    processed: Optional[Frame] = None
+    pending: Optional["PendingFrame"] = None
+    detections: Optional[Callable[[], Detections]] = None
+    result: Optional[Dict[str, Any]] = None
+    started: float = field(default_factory=time.perf_counter)
+
+
+class StagedPipeline:
+    """Run capture, preprocessing, inference, postprocessing and DB writes as concurrent stages.
+
+    Every stage has a single worker thread, so stateful components (the
+    preprocessor's scratch buffers, change detector, tracker, aggregator)
+    still see frames in capture order, and consecutive stages are joined by
+    queues of `queue_size` frames. Capture of frame N+1 then overlaps
+    inference of frame N and the DB write of frame N-1, throughput
+    approaches the slowest stage, and at most a few frames are in flight.
+
+    Frames enter through a `SheddingQueue`: with a policy other than
+    `block`, a camera faster than the slowest stage sheds frames at the
+    entrance instead of stalling capture, so memory and latency stay bounded.
+    """
+
+    STAGES = ("preprocess", "inference", "postprocess", "save")
+
+    def __init__(
+        self,
+        manager: "PipelineManager",
+        queue_size: int = 2,
+        gate: bool = True,
+        sample_metadata: Optional[Dict[str, Any]] = None,
+        policy: str = BLOCK,
+        keep_every: int = 2,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.manager = manager
+        self.queue_size = max(1, int(queue_size))
+        self.gate = gate
+        self.sample_metadata = sample_metadata
+        self.sample_id: Optional[int] = None
+        self.stop_event = threading.Event()
+        self.completed = {name: 0 for name in ("capture",) + self.STAGES}
+        self.shed = 0
+        self._last_shed_log = 0.0
+        self._queues: List[Any] = [SheddingQueue(self.queue_size, policy=policy, keep_every=keep_every, on_shed=self._shed)]
+        self._queues += [queue.Queue(maxsize=self.queue_size) for _ in self.STAGES]
+        self._threads: List[threading.Thread] = []
+        self._failure: Optional[BaseException] = None
+        self._finished = False
+
+    def _preprocess(self, job: _Job) -> None:
+        if self.gate:
+            job.result = self.manager._gate_frame(job.frame)
+            if job.result is not None:
+                return
+        # With a process pool, several frames are preprocessed at once; inference waits for each.
+        job.pending = self.manager._submit_preprocess(job.frame)
+        if job.pending is None:
+            job.processed = self.manager._preprocess(job.frame)
+
+    def _inference(self, job: _Job) -> None:
+        if job.pending is not None:
+            job.processed = job.frame.with_array(job.pending.result())
+            job.pending = None
+        if job.result is None:
+            # With batching, queue this frame's inference and move on so the next frames join the batch;
+            # postprocessing waits for the detections. Flush when no frame is waiting behind this one.
+            job.detections = self.manager._submit_detection(job.processed.array, flush=self._queues[1].qsize() == 0)
+
+    def _postprocess(self, job: _Job) -> None:
+        if job.result is None:
+            job.result = self.manager._postprocess(job.frame, job.processed, job.detections())
+
+    def _save(self, job: _Job) -> None:
+        if self.sample_metadata is not None and not job.result.get("rejected"):
+            # One sample per run; only the save worker touches sample_id.
+            if self.sample_id is None:
+                self.sample_id = self.manager.start_sample(self.sample_metadata, job.result)
+            self.manager.save_frame(self.sample_id, job.result)
+
+    def _capture(self, frames: Iterable[Frame]) -> None:
+        try:
+            for frame in frames:
+                if self.stop_event.is_set():
+                    break
+                self.completed["capture"] += 1
+                self._queues[0].put(_Job(frame))
+        except Exception as exc:
+            self._fail("capture", exc)
+        finally:
+            self._queues[0].put(_END, force=True)
+
+    def _shed(self, job: _Job) -> None:
+        self._discard(job)
+        self.shed += 1
+        self.manager.metrics.tick("shed")
+        now = time.monotonic()
+        if now - self._last_shed_log >= SHED_LOG_INTERVAL:
+            self._last_shed_log = now
+            self.logger.warning(
+                "Pipeline overloaded; shed frame %s (%s shed of %s captured, policy %s)",
+                job.frame.sequence,
+                self.shed,
+                self.completed["capture"],
+                self._queues[0].policy,
+            )
+
+    def _work(self, name: str, step: Callable[[_Job], None], inbox: Any, outbox: queue.Queue) -> None:
+        while True:
+            job = inbox.get()
+            if job is _END:
+                outbox.put(_END)
+                return
+            # After a failure or close(), keep draining so upstream stages never block.
+            if self.stop_event.is_set():
+                self._discard(job)
+                continue
+            try:
+                step(job)
+            except Exception as exc:
+                self._fail(name, exc)
+                self._discard(job)
+                continue
+            self.completed[name] += 1
+            outbox.put(job)
+
+    @staticmethod
+    def _discard(job: _Job) -> None:
+        """Drop a job, first waiting out any pool preprocessing still writing its shared buffers."""
+        if job.pending is not None:
+            job.pending.discard()
+            job.pending = None
+
+    def _fail(self, stage: str, exc: BaseException) -> None:
+        self.logger.exception("Stage %s failed; stopping pipeline", stage)
+        if self._failure is None:
+            self._failure = exc
+        self.stop_event.set()
+
+    def run(self, frames: Iterable[Frame]) -> Iterator[Dict[str, Any]]:
+        """Start the workers and yield accepted results in capture order."""
+        steps = (self._preprocess, self._inference, self._postprocess, self._save)
+        self._threads = [threading.Thread(target=self._capture, args=(frames,), name="Stage-capture", daemon=True)]
+        for idx, (name, step) in enumerate(zip(self.STAGES, steps)):
+            self._threads.append(
+                threading.Thread(
+                    target=self._work,
+                    args=(name, step, self._queues[idx], self._queues[idx + 1]),
+                    name=f"Stage-{name}",
+                    daemon=True,
+                )
+            )
+        metrics = self.manager.metrics
+        for name, q in zip(self.STAGES + ("output",), self._queues):
+            metrics.add_gauge(f"pipeline.{name}", q.qsize)
+        for thread in self._threads:
+            thread.start()
+        try:
+            while True:
+                job = self._queues[-1].get()
+                if job is _END:
+                    self._finished = True
+                    break
+                if not job.result.get("rejected"):
+                    metrics.record("total", time.perf_counter() - job.started)
+                    yield job.result
+        finally:
+            self.close()
+        if self._failure is not None:
+            raise self._failure
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Frames waiting in front of each stage (and of the consumer)."""
+        return {name: q.qsize() for name, q in zip(self.STAGES + ("output",), self._queues)}
+
+    def close(self) -> None:
+        """Stop capturing, discard in-flight frames and join the workers."""
+        if not self._threads:
+            return
+        if not self._finished:
+            self.stop_event.set()
+            while True:
+                job = self._queues[-1].get()
+                if job is _END:
+                    break
+                self._discard(job)
+            self._finished = True
+        for thread in self._threads:
+            thread.join()
+        for name in self.STAGES + ("output",):
+            self.manager.metrics.remove_gauge(f"pipeline.{name}")
+        self.logger.info("Staged pipeline finished: %s, %s frames shed", self.completed, self.shed)
@@ -1,23 +1,340 @@
-"""Postprocessing placeholders for AquaLens."""
+"""Postprocessing for AquaLens detections: NMS, box merging and counting."""
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Dict, Iterable, Optional, Tuple
 
+import numpy as np
 
-def non_max_suppression(detections: List[Dict[str, Any]], threshold: float = 0.4):
-    """Placeholder for NMS to reduce overlapping detections."""
-    # TODO: implement NMS logic
-    return detections
+from core.detections import Detections
+from core.tiling import Tile
 
 
-def merge_bounding_boxes(detections: List[Dict[str, Any]]):
-    """Placeholder for merging overlapping bounding boxes."""
-    # TODO: implement bounding box merging
-    return detections
+def combine_tile_detections(tile_outputs: Iterable[Tuple[Tile, Detections]]) -> Detections:
+    """Map per-tile detections into frame coordinates and concatenate them."""
+    return Detections.concat(tile.to_frame(detections) for tile, detections in tile_outputs)
 
 
-def count_per_species(detections: List[Dict[str, Any]]):
-    """Placeholder for species counting aggregation."""
-    # TODO: implement species-specific counting
-    return {}
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU of one [x1, y1, x2, y2] box against an (N, 4) array."""
+    ix1 = np.maximum(box[0], boxes[:, 0])
+    iy1 = np.maximum(box[1], boxes[:, 1])
+    ix2 = np.minimum(box[2], boxes[:, 2])
+    iy2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def _offset_by_class(boxes: np.ndarray, class_ids: np.ndarray) -> np.ndarray:
+    """Shift each class into its own x range so one pass never mixes species."""
+    if boxes.size == 0:
+        return boxes
+    span = float(boxes[:, 2].max() - min(boxes[:, 0].min(), 0.0)) + 1.0
+    shifted = boxes.copy()
+    shifted[:, [0, 2]] += (class_ids.astype(boxes.dtype) * span)[:, None]
+    return shifted
+
+
+def overlap_pairs(boxes: np.ndarray, min_iou: float = 0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return index pairs (i, j) and their IoU for all boxes overlapping by more than `min_iou`.
+
+    Boxes are swept in x1 order and only pairs whose x-extents intersect are
+    expanded, so sparse frames cost close to O(N log N) rather than O(N^2).
+    """
+    count = len(boxes)
+    if count < 2:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0, dtype=np.float32)
+    order = np.argsort(boxes[:, 0], kind="stable")
+    x1_sorted = boxes[order, 0]
+    ends = np.searchsorted(x1_sorted, boxes[order, 2], side="left")
+    counts = np.clip(ends - np.arange(1, count + 1), 0, None)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0, dtype=np.float32)
+    # Work in sorted positions on contiguous columns; map back to input indices at the end.
+    x1, y1, x2, y2 = (np.ascontiguousarray(boxes[order, col]) for col in range(4))
+    first = np.repeat(np.arange(count), counts)
+    second = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    second += first
+    second += 1
+    iy = np.minimum(y2[first], y2[second]) - np.maximum(y1[first], y1[second])
+    overlapping = iy > 0
+    first, second, iy = first[overlapping], second[overlapping], iy[overlapping]
+    ix = np.minimum(x2[first], x2[second]) - np.maximum(x1[first], x1[second])
+    inter = np.clip(ix, 0, None) * iy
+    areas = (x2 - x1) * (y2 - y1)
+    iou = inter / np.maximum(areas[first] + areas[second] - inter, 1e-9)
+    mask = (inter > 0) & (iou > min_iou)
+    return order[first[mask]], order[second[mask]], iou[mask].astype(np.float32)
+
+
+def connected_components(count: int, i_idx: np.ndarray, j_idx: np.ndarray) -> np.ndarray:
+    """Label graph components by vectorized min-label propagation."""
+    labels = np.arange(count)
+    if i_idx.size == 0:
+        return labels
+    while True:
+        low = np.minimum(labels[i_idx], labels[j_idx])
+        updated = labels.copy()
+        np.minimum.at(updated, i_idx, low)
+        np.minimum.at(updated, j_idx, low)
+        # Pointer jumping collapses long chains in few iterations.
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def _soft_nms_dense(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float, method: str, sigma: float, score_threshold: float):
+    current = scores.copy()
+    remaining = np.flatnonzero(current >= score_threshold)
+    keep, kept_scores = [], []
+    while remaining.size:
+        pos = int(np.argmax(current[remaining]))
+        best = remaining[pos]
+        keep.append(best)
+        kept_scores.append(current[best])
+        remaining = np.delete(remaining, pos)
+        if not remaining.size:
+            break
+        iou = box_iou(boxes[best], boxes[remaining])
+        if method == "linear":
+            decay = np.where(iou > iou_threshold, 1.0 - iou, 1.0)
+        else:
+            decay = np.exp(-(iou * iou) / sigma)
+        current[remaining] *= decay.astype(np.float32)
+        remaining = remaining[current[remaining] >= score_threshold]
+    return keep, kept_scores
+
+
+def nms_arrays(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    class_ids: np.ndarray,
+    iou_threshold: float = 0.4,
+    method: str = "hard",
+    sigma: float = 0.5,
+    score_threshold: float = 0.001,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-class NMS over (N, 4) boxes; returns kept indices and their (possibly decayed) scores.
+
+    `method` is "hard", "linear" or "gaussian" (soft-NMS, Bodla et al. 2017).
+    Overlapping pairs are found once with a vectorized sweep. Hard NMS then
+    walks only boxes that can suppress something; soft-NMS runs the dense
+    update inside each overlap component, since boxes in different
+    components never affect each other.
+    """
+    count = len(boxes)
+    if count == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+    shifted = _offset_by_class(np.asarray(boxes, dtype=np.float32), np.asarray(class_ids))
+    scores = np.asarray(scores, dtype=np.float32)
+    order = np.argsort(-scores, kind="stable")
+
+    if method == "hard":
+        i_idx, j_idx, _ = overlap_pairs(shifted, iou_threshold)
+        if i_idx.size == 0:
+            return order, scores[order]
+        rank = np.empty(count, dtype=np.intp)
+        rank[order] = np.arange(count)
+        # Orient every edge from the higher-scored box to the one it may suppress.
+        swap = rank[i_idx] > rank[j_idx]
+        source = np.where(swap, j_idx, i_idx)
+        target = np.where(swap, i_idx, j_idx)
+        edge_order = np.argsort(source, kind="stable")
+        source, target = source[edge_order], target[edge_order]
+        starts = np.searchsorted(source, np.arange(count), side="left")
+        stops = np.searchsorted(source, np.arange(count), side="right")
+        suppressed = np.zeros(count, dtype=bool)
+        has_edges = stops > starts
+        for idx in order[has_edges[order]].tolist():
+            if not suppressed[idx]:
+                suppressed[target[starts[idx] : stops[idx]]] = True
+        keep = order[~suppressed[order]]
+        return keep, scores[keep]
+
+    i_idx, j_idx, _ = overlap_pairs(shifted, iou_threshold if method == "linear" else 0.0)
+    labels = connected_components(count, i_idx, j_idx)
+    sizes = np.bincount(labels, minlength=count)
+    singles = order[sizes[labels[order]] == 1]
+    # Isolated boxes never decay but still face the same score floor as boxes in components.
+    singles = singles[scores[singles] >= score_threshold]
+    keep, kept_scores = singles.tolist(), scores[singles].tolist()
+    for label in np.flatnonzero(sizes > 1).tolist():
+        members = np.flatnonzero(labels == label) if sizes[label] < count else np.arange(count)
+        local_keep, local_scores = _soft_nms_dense(
+            shifted[members], scores[members], iou_threshold, method, sigma, score_threshold
+        )
+        keep.extend(members[local_keep].tolist())
+        kept_scores.extend(local_scores)
+    keep_arr = np.asarray(keep, dtype=np.intp)
+    score_arr = np.asarray(kept_scores, dtype=np.float32)
+    final = np.argsort(-score_arr, kind="stable")
+    return keep_arr[final], score_arr[final]
+
+
+def non_max_suppression(
+    detections: Detections,
+    threshold: float = 0.4,
+    method: str = "hard",
+    sigma: float = 0.5,
+    score_threshold: float = 0.001,
+) -> Detections:
+    """Suppress overlapping detections of the same species."""
+    if len(detections) < 2:
+        return detections
+    keep, kept_scores = nms_arrays(
+        detections.boxes,
+        detections.scores,
+        detections.class_ids,
+        iou_threshold=threshold,
+        method=method,
+        sigma=sigma,
+        score_threshold=score_threshold,
+    )
+    kept = detections[keep]
+    return kept if method == "hard" else kept.with_scores(kept_scores)
+
+
+def grid_candidate_pairs(boxes: np.ndarray, cell_size: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Return unique (i, j), i < j, of boxes sharing at least one uniform-grid cell.
+
+    The cell size defaults to twice the median box side so each box spans
+    only a few cells; candidate generation is then near-linear in N.
+    """
+    count = len(boxes)
+    empty = np.empty(0, dtype=np.intp)
+    if count < 2:
+        return empty, empty
+    if cell_size is None:
+        sides = np.concatenate([boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]])
+        cell_size = max(float(np.median(sides)) * 2.0, 1.0)
+    origin = boxes[:, :2].min(axis=0)
+    cx0 = ((boxes[:, 0] - origin[0]) // cell_size).astype(np.int64)
+    cy0 = ((boxes[:, 1] - origin[1]) // cell_size).astype(np.int64)
+    cx1 = ((boxes[:, 2] - origin[0]) // cell_size).astype(np.int64)
+    cy1 = ((boxes[:, 3] - origin[1]) // cell_size).astype(np.int64)
+    span_x, span_y = cx1 - cx0 + 1, cy1 - cy0 + 1
+    cells_per_box = span_x * span_y
+    # Expand every box into the (box, cell) entries it occupies.
+    owner = np.repeat(np.arange(count), cells_per_box)
+    local = np.arange(int(cells_per_box.sum())) - np.repeat(np.cumsum(cells_per_box) - cells_per_box, cells_per_box)
+    cell_x = cx0[owner] + local % span_x[owner]
+    cell_y = cy0[owner] + local // span_x[owner]
+    cell_key = cell_y * (int(cx1.max()) + 1) + cell_x
+    order = np.lexsort((owner, cell_key))
+    cell_key, owner = cell_key[order], owner[order]
+    group_end = np.searchsorted(cell_key, cell_key, side="right")
+    later = group_end - np.arange(len(cell_key)) - 1
+    total = int(later.sum())
+    if total == 0:
+        return empty, empty
+    first = np.repeat(np.arange(len(cell_key)), later)
+    second = first + 1 + np.arange(total) - np.repeat(np.cumsum(later) - later, later)
+    i_idx, j_idx = owner[first], owner[second]
+    # Boxes sharing several cells produce repeated pairs; keep each once.
+    pair_ids = np.unique(np.minimum(i_idx, j_idx) * count + np.maximum(i_idx, j_idx))
+    return pair_ids // count, pair_ids % count
+
+
+def merge_bounding_boxes(
+    detections: Detections,
+    tile_rects: Optional[np.ndarray] = None,
+    iou_threshold: float = 0.5,
+    containment_threshold: float = 0.8,
+    method: str = "union",
+    min_iou: float = 0.0,
+) -> Detections:
+    """Merge same-species duplicates of one organism split across tile seams.
+
+    Only frames inferred in tiles are merged: `tile_rects` are the (T, 4)
+    frame rectangles of the tiles `detections.tile_ids` refer to. A pair is
+    linked when the two boxes come from different tiles, both reach into the
+    band those tiles share, their IoU is above `min_iou` (the NMS threshold,
+    so no pair NMS deliberately kept is linked) and either the IoU reaches
+    `iou_threshold` or one box is mostly inside the other (intersection /
+    smaller area at least `containment_threshold`).
+
+    Links are taken in decreasing IoU and a group never holds two boxes from
+    the same tile, so adjacent organisms cannot chain into one detection.
+    Each group keeps its most confident member, with the box replaced by the
+    union ("union") or confidence-weighted mean ("weighted").
+    """
+    count = len(detections)
+    if count < 2 or tile_rects is None or len(tile_rects) < 2 or detections.tile_ids is None:
+        return detections
+    boxes = detections.boxes.astype(np.float64)
+    scores = detections.scores.astype(np.float64)
+    class_ids = detections.class_ids
+    tile_ids = detections.tile_ids
+    i_idx, j_idx = grid_candidate_pairs(boxes)
+    keep = (class_ids[i_idx] == class_ids[j_idx]) & (tile_ids[i_idx] != tile_ids[j_idx])
+    i_idx, j_idx = i_idx[keep], j_idx[keep]
+    if i_idx.size == 0:
+        return detections
+    a, b = boxes[i_idx], boxes[j_idx]
+    # Overlap band of the two source tiles; both boxes must reach into it.
+    rect_a, rect_b = tile_rects[tile_ids[i_idx]], tile_rects[tile_ids[j_idx]]
+    band = np.concatenate([np.maximum(rect_a[:, :2], rect_b[:, :2]), np.minimum(rect_a[:, 2:], rect_b[:, 2:])], axis=1)
+    in_band = _intersects(a, band) & _intersects(b, band)
+    inter = np.clip(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0, None) * np.clip(
+        np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0, None
+    )
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    iou = inter / np.maximum(area_a + area_b - inter, 1e-9)
+    containment = inter / np.maximum(np.minimum(area_a, area_b), 1e-9)
+    linked = in_band & (iou > min_iou) & ((iou >= iou_threshold) | (containment >= containment_threshold))
+    if not linked.any():
+        return detections
+
+    i_idx, j_idx, iou = i_idx[linked], j_idx[linked], iou[linked]
+    cluster = np.arange(count)
+    members = {index: {int(tile_ids[index])} for index in range(count)}
+    for pair in np.argsort(-iou, kind="stable").tolist():
+        left, right = cluster[i_idx[pair]], cluster[j_idx[pair]]
+        if left == right or members[left] & members[right]:
+            continue
+        members[left] |= members.pop(right)
+        cluster[cluster == right] = left
+    _, cluster = np.unique(cluster, return_inverse=True)
+    clusters = int(cluster.max()) + 1
+    if clusters == count:
+        return detections
+    if method == "weighted":
+        weights = np.maximum(scores, 1e-6)
+        merged = np.zeros((clusters, 4))
+        np.add.at(merged, cluster, boxes * weights[:, None])
+        totals = np.zeros(clusters)
+        np.add.at(totals, cluster, weights)
+        merged /= totals[:, None]
+    else:
+        merged = np.full((clusters, 4), np.inf)
+        merged[:, 2:] = -np.inf
+        np.minimum.at(merged[:, 0], cluster, boxes[:, 0])
+        np.minimum.at(merged[:, 1], cluster, boxes[:, 1])
+        np.maximum.at(merged[:, 2], cluster, boxes[:, 2])
+        np.maximum.at(merged[:, 3], cluster, boxes[:, 3])
+    # Representative = most confident member of each cluster.
+    order = np.lexsort((-scores, cluster))
+    representatives = order[np.searchsorted(cluster[order], np.arange(clusters))]
+    return detections[representatives].with_boxes(merged)
+
+
+def _intersects(boxes: np.ndarray, rects: np.ndarray) -> np.ndarray:
+    """Row-wise: whether each box overlaps the matching rectangle with positive area."""
+    return (np.minimum(boxes[:, 2], rects[:, 2]) > np.maximum(boxes[:, 0], rects[:, 0])) & (
+        np.minimum(boxes[:, 3], rects[:, 3]) > np.maximum(boxes[:, 1], rects[:, 1])
+    )
+
+
+def count_per_species(detections: Detections) -> Dict[str, int]:
+    """Number of detections per species name."""
+    if not len(detections):
+        return {}
+    counts = np.bincount(detections.class_ids)
+    return {detections.species_name(class_id): int(counts[class_id]) for class_id in np.flatnonzero(counts).tolist()}
@@ -1,17 +1,173 @@
-"""Preprocessing placeholders for AquaLens."""
+"""Frame preprocessing for AquaLens."""
 
 from __future__ import annotations
 
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
 from PIL import Image
 
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+from core.frame import FramePool
+
 
 class Preprocessor:
-    """Placeholder preprocessing pipeline."""
+    """Denoise, illumination correction and contrast normalization on uint8 RGB arrays.
+
+    The stage list is built once from settings and disabled stages are never
+    visited. Denoising is the only neighbourhood operation; the per-pixel
+    flat-field gain and the normalization stretch are folded into a single
+    multiply-add pass. Scratch buffers are allocated once per frame shape and
+    outputs come from a FramePool, so steady-state processing does not allocate.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.settings = settings or {}
+        self.enable_denoise = self.settings.get("enable_denoise", False)
+        self.enable_normalization = self.settings.get("enable_normalization", False)
+        self.enable_illumination_correction = self.settings.get("enable_illumination_correction", False)
+        self.low_percentile = self.settings.get("normalization_low_percentile", 1.0)
+        self.high_percentile = self.settings.get("normalization_high_percentile", 99.0)
+        self.sample_step = self.settings.get("normalization_sample_step", 8)
+        self.flat_field: Optional[np.ndarray] = None
+        self._scaled_flat: Optional[np.ndarray] = None
+        self._shape: Optional[Tuple[int, ...]] = None
+        self._work: Optional[np.ndarray] = None
+        self._pad: Optional[np.ndarray] = None
+        self._rows: Optional[np.ndarray] = None
+        self._pool: Optional[FramePool] = None
+        self._stages = self._build_stages()
+        self.logger.info("Preprocessor stages: %s", [name for name, _ in self._stages] or "none")
+
+    def _build_stages(self) -> List[Tuple[str, Callable[[np.ndarray], np.ndarray]]]:
+        stages: List[Tuple[str, Callable[[np.ndarray], np.ndarray]]] = []
+        if self.enable_denoise:
+            stages.append(("denoise", self._denoise))
+        if self.enable_illumination_correction or self.enable_normalization:
+            stages.append(("pointwise", self._pointwise))
+        return stages
+
+    @property
+    def active(self) -> bool:
+        """True when at least one stage is enabled."""
+        return bool(self._stages)
+
+    def set_flat_field(self, gain: Optional[np.ndarray]) -> None:
+        """Install a gain map (h x w x 1 float32, any resolution) used for illumination correction."""
+        self.flat_field = None if gain is None else np.ascontiguousarray(gain, dtype=np.float32)
+        self._scaled_flat = None
+
+    def _flat_for(self, shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        """Return the flat-field gain resized to the frame once, then cached."""
+        if self.flat_field is None:
+            return None
+        height, width = shape[:2]
+        if self._scaled_flat is None or self._scaled_flat.shape[:2] != (height, width):
+            source = self.flat_field[..., 0]
+            if source.shape == (height, width):
+                scaled = source
+            elif cv2 is not None:
+                scaled = cv2.resize(source, (width, height), interpolation=cv2.INTER_LINEAR)
+            else:
+                scaled = np.asarray(Image.fromarray(source, mode="F").resize((width, height), Image.BILINEAR))
+            self._scaled_flat = np.ascontiguousarray(scaled, dtype=np.float32)[..., None]
+        return self._scaled_flat
+
+    def _ensure_buffers(self, shape: Tuple[int, ...]) -> None:
+        if self._shape == shape:
+            return
+        height, width = shape[:2]
+        self._shape = shape
+        self._work = np.empty(shape, dtype=np.float32)
+        if cv2 is None:
+            self._pad = np.empty((height + 2, width + 2) + shape[2:], dtype=np.float32)
+            self._rows = np.empty((height + 2, width) + shape[2:], dtype=np.float32)
+        self._pool = FramePool(shape, max_buffers=6)
+
+    def _denoise(self, image: np.ndarray) -> np.ndarray:
+        """3x3 binomial blur; uint8 in, uint8 (OpenCV) or float32 (NumPy fallback) out."""
+        if cv2 is not None:
+            out = self._pool.acquire()
+            cv2.GaussianBlur(image, (3, 3), 0, dst=out)
+            return out
+        pad, rows, work = self._pad, self._rows, self._work
+        pad[1:-1, 1:-1] = image
+        pad[0, 1:-1] = image[0]
+        pad[-1, 1:-1] = image[-1]
+        pad[:, 0] = pad[:, 1]
+        pad[:, -1] = pad[:, -2]
+        # Separable [1 2 1] / 4 passes written into preallocated scratch.
+        np.add(pad[:, :-2], pad[:, 2:], out=rows)
+        rows += pad[:, 1:-1]
+        rows += pad[:, 1:-1]
+        np.add(rows[:-2], rows[2:], out=work)
+        work += rows[1:-1]
+        work += rows[1:-1]
+        work *= np.float32(1.0 / 16.0)
+        return work
+
+    def _stretch(self, image: np.ndarray, gain: Optional[np.ndarray]) -> Tuple[float, float]:
+        """Return (alpha, beta) mapping the sampled percentile range onto 0..255."""
+        step = self.sample_step
+        sample = image[::step, ::step].astype(np.float32)
+        if gain is not None:
+            sample *= gain[::step, ::step]
+        low, high = np.percentile(sample, (self.low_percentile, self.high_percentile))
+        if high - low < 1e-3:
+            return 1.0, 0.0
+        alpha = 255.0 / float(high - low)
+        return alpha, -float(low) * alpha
+
+    def _pointwise(self, image: np.ndarray) -> np.ndarray:
+        """Apply flat-field gain and normalization as one fused multiply-add."""
+        gain = self._flat_for(image.shape) if self.enable_illumination_correction else None
+        alpha, beta = self._stretch(image, gain) if self.enable_normalization else (1.0, 0.0)
+        out = self._pool.acquire()
+        if gain is None and image.dtype == np.uint8:
+            # A saturating 256-entry table gives the same rounding and clipping as the float path below.
+            table = np.arange(256, dtype=np.float32) * np.float32(alpha)
+            table += np.float32(beta + 0.5)
+            np.clip(table, 0.0, 255.0, out=table)
+            table = table.astype(np.uint8)
+            if cv2 is not None:
+                cv2.LUT(image, table, dst=out)
+            else:
+                np.take(table, image, out=out)
+            return out
+        if gain is None:
+            work = self._work
+            np.multiply(image, np.float32(alpha), out=work)
+        else:
+            work = self._work
+            np.multiply(image, gain * np.float32(alpha), out=work)
+        work += np.float32(beta + 0.5)
+        np.clip(work, 0.0, 255.0, out=work)
+        np.copyto(out, work, casting="unsafe")
+        return out
 
-    def __init__(self):
-        pass
+    def apply(self, image: np.ndarray) -> np.ndarray:
+        """Run the enabled stages and return a uint8 array of the same shape.
 
-    def apply(self, image: Image.Image) -> Image.Image:
-        """Placeholder for illumination correction, denoise, normalization."""
-        # TODO: implement preprocessing steps (illumination correction, denoise, normalization)
-        return image
+        Returns the input array itself when every stage is disabled; otherwise
+        the output is a pooled buffer and the input is never modified.
+        """
+        if not self._stages:
+            return image
+        self._ensure_buffers(image.shape)
+        current = image
+        for _, stage in self._stages:
+            current = stage(current)
+        if current.dtype != np.uint8:
+            # NumPy denoise without a pointwise stage leaves float32 scratch data.
+            out = self._pool.acquire()
+            current += np.float32(0.5)
+            np.clip(current, 0.0, 255.0, out=current)
+            np.copyto(out, current, casting="unsafe")
+            current = out
+        return current
@@ -0,0 +1,79 @@
+"""Focus and exposure quality metrics for live preview frames."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+
+
+@dataclass
+class QualityMetrics:
+    """Image quality summary computed on a decimated region of interest."""
+
+    sharpness: float
+    brightness: float
+    clipped_low: float
+    clipped_high: float
+    noise: float
+    histogram: List[int] = field(default_factory=list)
+
+    @property
+    def exposure_ok(self) -> bool:
+        return self.clipped_high < 0.02 and self.clipped_low < 0.05 and 40.0 <= self.brightness <= 215.0
+
+
+def _roi_luma(array: np.ndarray, roi_fraction: float, step: int) -> np.ndarray:
+    """Return a strided grayscale view of the centred ROI as float32."""
+    height, width = array.shape[:2]
+    roi_h = max(int(height * roi_fraction), 3 * step)
+    roi_w = max(int(width * roi_fraction), 3 * step)
+    top = (height - roi_h) // 2
+    left = (width - roi_w) // 2
+    roi = array[top : top + roi_h : step, left : left + roi_w : step]
+    if roi.ndim == 2:
+        return roi.astype(np.float32)
+    # BT.601 weights; only the decimated pixels are touched.
+    luma = roi[..., 0] * np.float32(0.299)
+    luma += roi[..., 1] * np.float32(0.587)
+    luma += roi[..., 2] * np.float32(0.114)
+    return luma
+
+
+def compute_quality(array: np.ndarray, roi_fraction: float = 0.5, step: int = 2, bins: int = 16) -> QualityMetrics:
+    """Compute sharpness, brightness, clipping and noise for an RGB or gray uint8 frame.
+
+    Sharpness is the variance of the 4-neighbour Laplacian; noise uses
+    Immerkaer's fast estimator, both built from shifted slices so no Python
+    loops run per pixel.
+    """
+    luma = _roi_luma(array, roi_fraction, step)
+    centre = luma[1:-1, 1:-1]
+    up, down = luma[:-2, 1:-1], luma[2:, 1:-1]
+    left, right = luma[1:-1, :-2], luma[1:-1, 2:]
+    laplacian = up + down + left + right - 4.0 * centre
+    sharpness = float(laplacian.var())
+
+    # Immerkaer (1996): the 3x3 kernel [1 -2 1; -2 4 -2; 1 -2 1] cancels image structure to first order.
+    corners = luma[:-2, :-2] + luma[:-2, 2:] + luma[2:, :-2] + luma[2:, 2:]
+    edges = up + down + left + right
+    response = corners - 2.0 * edges + 4.0 * centre
+    noise = float(np.sqrt(np.pi / 2.0) * np.abs(response).mean() / 6.0)
+
+    histogram = np.bincount(np.clip(luma, 0, 255).astype(np.uint8).ravel(), minlength=256)
+    total = float(histogram.sum()) or 1.0
+    levels = np.arange(256, dtype=np.float64)
+    brightness = float((histogram * levels).sum() / total)
+    clipped_low = float(histogram[:5].sum() / total)
+    clipped_high = float(histogram[251:].sum() / total)
+    coarse = histogram.reshape(bins, -1).sum(axis=1) if 256 % bins == 0 else np.histogram(luma, bins=bins, range=(0, 256))[0]
+
+    return QualityMetrics(
+        sharpness=sharpness,
+        brightness=brightness,
+        clipped_low=clipped_low,
+        clipped_high=clipped_high,
+        noise=noise,
+        histogram=coarse.astype(int).tolist(),
+    )
@@ -0,0 +1,52 @@
+"""Settings and logging setup shared by the GUI and headless entry points."""
+
+from __future__ import annotations
+
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+try:
+    import yaml  # type: ignore
+except ImportError:
+    yaml = None
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOG_FILE = BASE_DIR / "logs" / "aqulens.log"
+SETTINGS_FILE = BASE_DIR / "config" / "settings.yaml"
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """Configure application-wide logging."""
+    LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        handlers=[
+            logging.FileHandler(LOG_FILE, encoding="utf-8"),
+            logging.StreamHandler(sys.stdout),
+        ],
+    )
+    logging.info("Logging initialized")
+
+
+def load_settings(path: Path = SETTINGS_FILE) -> Dict[str, Any]:
+    """Load YAML settings with safe defaults when PyYAML is unavailable."""
+    if not path.exists() or yaml is None:
+        logging.warning("Settings file missing or PyYAML unavailable; using defaults")
+        return {}
+
+    with path.open("r", encoding="utf-8") as file:
+        data = yaml.safe_load(file) or {}
+        logging.info("Settings loaded from %s", path)
+        return data
+
+
+def data_dir(settings: Dict[str, Any]) -> Path:
+    return Path(settings.get("data_dir", BASE_DIR / "data"))
+
+
+def database_path(settings: Dict[str, Any]) -> Path:
+    return Path(settings.get("database", {}).get("path", data_dir(settings) / "aqulens.db"))
@@ -0,0 +1,138 @@
+"""Write-behind persistence of raw frames for AquaLens."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from core.frame import Frame
+
+_SENTINEL = object()
+
+
+class FrameWriter:
+    """Encode and store raw frames on background worker threads.
+
+    Frames are queued with `submit()` and written under unique names, either
+    sequence-numbered within a session or content-addressed by pixel hash.
+    The queue is bounded so a slow SD card cannot grow memory without limit.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        workers: int = 2,
+        max_queue: int = 32,
+        naming: str = "sequence",
+        image_format: str = "jpg",
+        quality: int = 90,
+        fsync: bool = False,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.output_dir = Path(output_dir)
+        self.naming = naming
+        self.image_format = image_format.lower().lstrip(".")
+        self.quality = quality
+        self.fsync = fsync
+        self.session = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_path: Optional[Path] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._workers: List[threading.Thread] = []
+        for idx in range(max(1, int(workers))):
+            worker = threading.Thread(target=self._worker, name=f"FrameWriter-{idx}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self.logger.info("FrameWriter started (%s workers, queue=%s) in %s", len(self._workers), max_queue, self.output_dir)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, frame: Frame, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """Queue a frame for writing; returns False when it had to be dropped."""
+        if self._closed:
+            self.logger.warning("FrameWriter closed; frame %s not stored", frame.sequence)
+            return False
+        try:
+            self._queue.put(frame, block=block, timeout=timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            self.logger.warning("FrameWriter queue full; dropped frame %s", frame.sequence)
+            return False
+        return True
+
+    def _file_name(self, frame: Frame) -> str:
+        if self.naming == "content":
+            digest = hashlib.blake2b(frame.array.tobytes(), digest_size=16).hexdigest()
+            return f"{digest}.{self.image_format}"
+        return f"{self.session}_{frame.sequence:06d}.{self.image_format}"
+
+    def _write(self, frame: Frame) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        target = self.output_dir / self._file_name(frame)
+        if self.naming == "content" and target.exists():
+            return target
+        if target.exists():
+            # Sequence names repeat across CameraManager instances within one second; never overwrite.
+            stem, suffix, idx = target.stem, target.suffix, 1
+            while target.exists():
+                target = target.with_name(f"{stem}_{idx}{suffix}")
+                idx += 1
+        tmp_path = target.with_name(f".{target.name}.tmp")
+        save_kwargs = {"quality": self.quality} if self.image_format in ("jpg", "jpeg") else {}
+        image_format = "JPEG" if self.image_format in ("jpg", "jpeg") else self.image_format.upper()
+        with tmp_path.open("wb") as file:
+            frame.to_pil().save(file, format=image_format, **save_kwargs)
+            if self.fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, target)
+        return target
+
+    def _worker(self) -> None:
+        while True:
+            frame = self._queue.get()
+            try:
+                if frame is _SENTINEL:
+                    return
+                path = self._write(frame)
+                with self._stats_lock:
+                    self.written += 1
+                    self.last_path = path
+                self.logger.debug("Raw frame %s saved to %s", frame.sequence, path)
+            except Exception:
+                with self._stats_lock:
+                    self.failed += 1
+                self.logger.exception("Failed to store raw frame")
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every queued frame has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending frames and stop the worker threads."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        for _ in self._workers:
+            self._queue.put(_SENTINEL)
+        for worker in self._workers:
+            worker.join()
+        self.logger.info(
+            "FrameWriter closed (written=%s, dropped=%s, failed=%s)", self.written, self.dropped, self.failed
+        )
@@ -0,0 +1,65 @@
+"""Overlapping tile generation for high-resolution frames."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from core.detections import Detections
+
+
+@dataclass
+class Tile:
+    """A zero-copy view into a frame plus its offset in frame coordinates."""
+
+    array: np.ndarray
+    x: int
+    y: int
+    index: int
+
+    @property
+    def width(self) -> int:
+        return self.array.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.array.shape[0]
+
+    def to_frame(self, detections: Detections) -> Detections:
+        """Shift tile-local [x1, y1, x2, y2] boxes into frame coordinates, tagged with this tile."""
+        return detections.offset(self.x, self.y).from_tile(self.index)
+
+
+def _starts(length: int, tile: int, stride: int) -> List[int]:
+    """Tile origins along one axis; the last tile is pinned to the far edge."""
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile + 1, stride))
+    if starts[-1] != length - tile:
+        starts.append(length - tile)
+    return starts
+
+
+def tile_offsets(height: int, width: int, tile_size: int, overlap: int) -> List[tuple]:
+    """Return (x, y) origins covering the frame with at least `overlap` pixels shared."""
+    stride = max(1, tile_size - overlap)
+    return [(x, y) for y in _starts(height, tile_size, stride) for x in _starts(width, tile_size, stride)]
+
+
+def tile_rects(height: int, width: int, tile_size: int, overlap: int) -> np.ndarray:
+    """(T, 4) [x1, y1, x2, y2] frame rectangles of the tiles, indexed like `generate_tiles`."""
+    return np.array(
+        [(x, y, min(x + tile_size, width), min(y + tile_size, height)) for x, y in tile_offsets(height, width, tile_size, overlap)],
+        dtype=np.float64,
+    ).reshape(-1, 4)
+
+
+def generate_tiles(array: np.ndarray, tile_size: int = 640, overlap: int = 64) -> List[Tile]:
+    """Split a frame into overlapping tiles without copying pixel data."""
+    height, width = array.shape[:2]
+    return [
+        Tile(array=array[y : y + tile_size, x : x + tile_size], x=x, y=y, index=idx)
+        for idx, (x, y) in enumerate(tile_offsets(height, width, tile_size, overlap))
+    ]
@@ -0,0 +1,247 @@
+"""Multi-frame organism tracking so continuous captures count each organism once."""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from core.detections import Detections
+from core.postprocessing import connected_components, grid_candidate_pairs
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+_GATED = 1e6
+
+
+def hungarian(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Minimum-cost assignment for a dense (n, m) cost matrix; returns matched rows and columns.
+
+    Uses SciPy when installed, else a NumPy shortest-augmenting-path
+    Hungarian solver (O(n^2 m), vectorized over columns).
+    """
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(cost)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    rows, cols = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(cols + 1)
+    owner = np.zeros(cols + 1, dtype=np.intp)
+    way = np.zeros(cols + 1, dtype=np.intp)
+    for row in range(1, rows + 1):
+        owner[0] = row
+        col = 0
+        min_reduced = np.full(cols + 1, np.inf)
+        used = np.zeros(cols + 1, dtype=bool)
+        while True:
+            used[col] = True
+            current = owner[col]
+            reduced = cost[current - 1] - u[current] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = col
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_col = int(candidates.argmin()) + 1
+            delta = candidates[next_col - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_reduced[~used] -= delta
+            col = next_col
+            if owner[col] == 0:
+                break
+        while col:
+            previous = way[col]
+            owner[col] = owner[previous]
+            col = previous
+    assigned = np.flatnonzero(owner[1:])
+    row_idx, col_idx = owner[1:][assigned] - 1, assigned
+    if transposed:
+        row_idx, col_idx = col_idx, row_idx
+    order = np.argsort(row_idx)
+    return row_idx[order], col_idx[order]
+
+
+def _centroids(boxes: np.ndarray) -> np.ndarray:
+    return np.stack([(boxes[:, 0] + boxes[:, 2]) * 0.5, (boxes[:, 1] + boxes[:, 3]) * 0.5], axis=1)
+
+
+class OrganismTracker:
+    """Associate detections across frames and count each organism once.
+
+    Tracks move with a smoothed constant-velocity prediction. Candidate
+    track/detection pairs of the same species come from a uniform-grid index
+    and are kept when IoU reaches `min_iou` or centroids lie within
+    `max_distance` pixels. The bipartite candidate graph is split into
+    connected components and each is solved optimally on its own, so cost
+    stays near-linear when organisms are spread over the field. A track
+    counts as a unique organism once it has been matched `min_hits` times
+    and is dropped after `max_missed` frames without a match.
+    """
+
+    def __init__(
+        self,
+        min_iou: float = 0.1,
+        max_distance: float = 40.0,
+        min_hits: int = 2,
+        max_missed: int = 5,
+        smoothing: float = 0.5,
+        names: Sequence[str] = (),
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.min_iou = float(min_iou)
+        self.max_distance = max(1.0, float(max_distance))
+        self.min_hits = max(1, int(min_hits))
+        self.max_missed = max(0, int(max_missed))
+        self.smoothing = min(max(float(smoothing), 0.0), 1.0)
+        self.names = tuple(names)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all tracks and unique counts, e.g. for a new sample."""
+        self._boxes = np.empty((0, 4), dtype=np.float32)
+        self._velocity = np.empty((0, 2), dtype=np.float32)
+        self._class_ids = np.empty(0, dtype=np.int32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._hits = np.empty(0, dtype=np.int32)
+        self._missed = np.empty(0, dtype=np.int32)
+        self._confirmed = np.empty(0, dtype=bool)
+        self._unique = np.zeros(0, dtype=np.int64)
+        self._next_id = 1
+
+    @property
+    def active_tracks(self) -> int:
+        return len(self._ids)
+
+    def _candidates(self, predicted: np.ndarray, detections: Detections) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Gated (track, detection, cost) triples."""
+        tracks = len(predicted)
+        # Growing every box by half the gate makes any pair within `max_distance` overlap.
+        grow = np.float32(self.max_distance * 0.5)
+        grown = np.concatenate([predicted, detections.boxes]) + np.asarray((-grow, -grow, grow, grow), dtype=np.float32)
+        i_idx, j_idx = grid_candidate_pairs(grown)
+        cross = (i_idx < tracks) & (j_idx >= tracks)
+        track_idx, det_idx = i_idx[cross], j_idx[cross] - tracks
+        same = self._class_ids[track_idx] == detections.class_ids[det_idx]
+        track_idx, det_idx = track_idx[same], det_idx[same]
+        a, b = predicted[track_idx], detections.boxes[det_idx]
+        inter = np.clip(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0, None) * np.clip(
+            np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0, None
+        )
+        union = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]) + (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]) - inter
+        iou = inter / np.maximum(union, 1e-9)
+        distance = np.linalg.norm(_centroids(a) - _centroids(b), axis=1)
+        valid = (iou >= self.min_iou) | (distance <= self.max_distance)
+        cost = (1.0 - iou) + distance / self.max_distance
+        return track_idx[valid], det_idx[valid], cost[valid]
+
+    def _associate(self, tracks: int, detections: int, track_idx, det_idx, cost) -> Tuple[np.ndarray, np.ndarray]:
+        """Optimal matching, solved independently per connected component of the candidate graph."""
+        if track_idx.size == 0:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        labels = connected_components(tracks + detections, track_idx, det_idx + tracks)[track_idx]
+        edges_per_label = np.bincount(labels, minlength=tracks + detections)
+        single = edges_per_label[labels] == 1
+        matched_tracks, matched_dets = [track_idx[single]], [det_idx[single]]
+        if not single.all():
+            rest = np.flatnonzero(~single)
+            rest = rest[np.argsort(labels[rest], kind="stable")]
+            bounds = np.flatnonzero(np.diff(labels[rest])) + 1
+            for group in np.split(rest, bounds):
+                rows, row_local = np.unique(track_idx[group], return_inverse=True)
+                cols, col_local = np.unique(det_idx[group], return_inverse=True)
+                dense = np.full((len(rows), len(cols)), _GATED)
+                dense[row_local, col_local] = cost[group]
+                r, c = hungarian(dense)
+                ok = dense[r, c] < _GATED
+                matched_tracks.append(rows[r[ok]])
+                matched_dets.append(cols[c[ok]])
+        return np.concatenate(matched_tracks), np.concatenate(matched_dets)
+
+    def update(self, detections: Detections) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance one frame.
+
+        Returns the track id of every detection and a mask of detections
+        whose track became a confirmed unique organism in this frame.
+        """
+        if len(detections.names) > len(self.names):
+            self.names = detections.names
+        count = len(detections)
+        tracks = len(self._ids)
+        predicted = self._boxes + np.tile(self._velocity, 2)
+        if tracks and count:
+            match_t, match_d = self._associate(tracks, count, *self._candidates(predicted, detections))
+        else:
+            match_t = match_d = np.empty(0, dtype=np.intp)
+
+        boxes = predicted
+        if match_t.size:
+            motion = _centroids(detections.boxes[match_d]) - _centroids(self._boxes[match_t])
+            self._velocity[match_t] = self.smoothing * self._velocity[match_t] + (1.0 - self.smoothing) * motion
+            boxes[match_t] = detections.boxes[match_d]
+        self._boxes = boxes
+        matched = np.zeros(tracks, dtype=bool)
+        matched[match_t] = True
+        self._hits[matched] += 1
+        self._missed[matched] = 0
+        self._missed[~matched] += 1
+
+        new_dets = np.ones(count, dtype=bool)
+        new_dets[match_d] = False
+        new_idx = np.flatnonzero(new_dets)
+        track_of_det = np.empty(count, dtype=np.intp)
+        track_of_det[match_d] = match_t
+        track_of_det[new_idx] = tracks + np.arange(len(new_idx))
+        self._append(detections, new_idx)
+
+        newly_confirmed = ~self._confirmed & (self._hits >= self.min_hits)
+        self._confirmed |= newly_confirmed
+        if newly_confirmed.any():
+            class_counts = np.bincount(self._class_ids[newly_confirmed])
+            if len(class_counts) > len(self._unique):
+                self._unique = np.concatenate([self._unique, np.zeros(len(class_counts) - len(self._unique), dtype=np.int64)])
+            self._unique[: len(class_counts)] += class_counts
+
+        track_ids = self._ids[track_of_det]
+        confirmed_now = newly_confirmed[track_of_det]
+        self._prune()
+        return track_ids, confirmed_now
+
+    def _append(self, detections: Detections, idx: np.ndarray) -> None:
+        added = len(idx)
+        if not added:
+            return
+        self._boxes = np.concatenate([self._boxes, detections.boxes[idx]])
+        self._velocity = np.concatenate([self._velocity, np.zeros((added, 2), dtype=np.float32)])
+        self._class_ids = np.concatenate([self._class_ids, detections.class_ids[idx]])
+        self._ids = np.concatenate([self._ids, np.arange(self._next_id, self._next_id + added, dtype=np.int64)])
+        self._hits = np.concatenate([self._hits, np.ones(added, dtype=np.int32)])
+        self._missed = np.concatenate([self._missed, np.zeros(added, dtype=np.int32)])
+        self._confirmed = np.concatenate([self._confirmed, np.zeros(added, dtype=bool)])
+        self._next_id += added
+
+    def _prune(self) -> None:
+        alive = self._missed <= self.max_missed
+        if alive.all():
+            return
+        self._boxes = self._boxes[alive]
+        self._velocity = self._velocity[alive]
+        self._class_ids = self._class_ids[alive]
+        self._ids = self._ids[alive]
+        self._hits = self._hits[alive]
+        self._missed = self._missed[alive]
+        self._confirmed = self._confirmed[alive]
+
+    def unique_counts(self) -> Dict[str, int]:
+        """Confirmed unique organisms per species since the last reset."""
+        return {
+            (self.names[idx] if idx < len(self.names) else f"class_{idx}"): int(self._unique[idx])
+            for idx in np.flatnonzero(self._unique).tolist()
+        }
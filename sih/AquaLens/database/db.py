@@ -8,10 +8,13 @@ import sqlite3
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
 
 from PIL import Image
 
+if TYPE_CHECKING:
+    from core.detections import Detections
+
 
 class Database:
     """Lightweight SQLite helper for AquaLens data."""
@@ -72,6 +75,61 @@ class Database:
         self.logger.debug("Inserted image %s for sample %s", image_id, sample_id)
         return image_id
 
+    def get_image_data(self, image_id: int) -> Optional[bytes]:
+        """Return the stored image bytes, or None when missing."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM images WHERE id = ?", (image_id,)).fetchone()
+        return bytes(row[0]) if row and row[0] is not None else None
+
+    def list_image_refs(self, sample_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, int, Optional[str]]]:
+        """Return (image_id, sample_id, filename) for stored images that have pixel data."""
+        query = "SELECT id, sample_id, filename FROM images WHERE data IS NOT NULL"
+        params: Tuple[Any, ...] = ()
+        if sample_ids is not None:
+            sample_ids = tuple(sample_ids)
+            query += f" AND sample_id IN ({', '.join('?' for _ in sample_ids)})"
+            params = sample_ids
+        with self._connect() as conn:
+            return conn.execute(query + " ORDER BY id", params).fetchall()
+
+    def write_batch_results(self, entries: Iterable[Dict[str, Any]], replace: bool = False) -> int:
+        """Store many processed images in one transaction.
+
+        Each entry carries `sample_id`, `detections` and either an existing
+        `image_id` or a `filename` (plus optional encoded `data`) for a new
+        image row. With `replace`, earlier detections of existing images are
+        deleted first. Returns the number of detection rows written.
+        """
+        image_query = "INSERT INTO images (sample_id, data, filename, captured_at) VALUES (?, ?, ?, ?)"
+        detection_query = """
+            INSERT INTO detections (sample_id, image_id, species, confidence, bbox)
+            VALUES (?, ?, ?, ?, ?)
+        """
+        written = 0
+        now = datetime.utcnow().isoformat()
+        with self._connect() as conn:
+            for entry in entries:
+                sample_id, image_id = entry["sample_id"], entry.get("image_id")
+                if image_id is None:
+                    data = entry.get("data")
+                    blob = sqlite3.Binary(data) if data is not None else None
+                    image_id = conn.execute(image_query, (sample_id, blob, entry.get("filename"), now)).lastrowid
+                elif replace:
+                    conn.execute("DELETE FROM detections WHERE image_id = ?", (image_id,))
+                detections = entry["detections"]
+                conn.executemany(
+                    detection_query,
+                    [
+                        (sample_id, image_id, species, score, json.dumps(box))
+                        for species, score, box in zip(
+                            detections.species, detections.scores.tolist(), detections.boxes.tolist()
+                        )
+                    ],
+                )
+                written += len(detections)
+            conn.commit()
+        return written
+
     def insert_detection(self, sample_id: int, image_id: Optional[int], detection: Dict[str, Any]) -> int:
         """Insert detection metadata."""
         query = """
@@ -92,6 +150,48 @@ class Database:
         self.logger.debug("Inserted detection %s for sample %s", detection_id, sample_id)
         return detection_id
 
+    def insert_detections(self, sample_id: int, image_id: Optional[int], detections: "Detections") -> int:
+        """Insert a whole detection batch in one transaction; returns the number of rows."""
+        query = """
+            INSERT INTO detections (sample_id, image_id, species, confidence, bbox)
+            VALUES (?, ?, ?, ?, ?)
+        """
+        rows = [
+            (sample_id, image_id, species, score, json.dumps(box))
+            for species, score, box in zip(detections.species, detections.scores.tolist(), detections.boxes.tolist())
+        ]
+        with self._connect() as conn:
+            conn.executemany(query, rows)
+            conn.commit()
+        self.logger.debug("Inserted %s detections for sample %s", len(rows), sample_id)
+        return len(rows)
+
+    def set_calibration(self, key: str, value: str) -> None:
+        """Insert or replace a calibration entry."""
+        query = """
+            INSERT INTO calibration (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """
+        with self._connect() as conn:
+            conn.execute(query, (key, value))
+            conn.commit()
+        self.logger.debug("Stored calibration %s", key)
+
+    def get_calibration(self, key: str) -> Optional[str]:
+        """Return a calibration value or None when missing."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM calibration WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def list_calibration(self, prefix: str = "") -> Dict[str, str]:
+        """Return calibration entries whose key starts with prefix."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, value FROM calibration WHERE substr(key, 1, ?) = ?",
+                (len(prefix), prefix),
+            ).fetchall()
+        return {key: value for key, value in rows}
+
     def get_sample_results(self, sample_id: int) -> Dict[str, Any]:
         """Fetch sample, images, and detections in a structured format."""
         with self._connect() as conn:
@@ -9,6 +9,9 @@ import customtkinter as ctk
 
 from ui.utils import image_utils, styles
 
+PREVIEW_INTERVAL_MS = 100
+METRICS_INTERVAL_MS = 1000
+
 
 class CaptureScreen(ctk.CTkFrame):
     """Live capture interface."""
@@ -23,7 +26,10 @@ class CaptureScreen(ctk.CTkFrame):
         self.overlay_label = None
         self.toast_label = None
         self.preset_state = ctk.StringVar(value="Preset: Surface")
+        self._last_preview_sequence = 0
         self._build_layout()
+        self.after(PREVIEW_INTERVAL_MS, self._poll_preview)
+        self.after(METRICS_INTERVAL_MS, self._poll_metrics)
 
     def _build_layout(self) -> None:
         header = ctk.CTkFrame(self, fg_color="#0F2435", corner_radius=12)
@@ -105,6 +111,9 @@ class CaptureScreen(ctk.CTkFrame):
 
         toggle = ctk.CTkCheckBox(side_panel, text="Auto-save to database", variable=self.auto_save)
         toggle.pack(anchor="w", padx=10, pady=5)
+        session_btn = ctk.CTkButton(side_panel, text="New sample session", command=self._new_session)
+        styles.style_button(session_btn, primary=False)
+        session_btn.pack(anchor="w", padx=10, pady=5)
 
         preset_frame = ctk.CTkFrame(side_panel, fg_color="transparent")
         preset_frame.pack(fill="x", padx=10, pady=8)
@@ -118,33 +127,107 @@ class CaptureScreen(ctk.CTkFrame):
         ctk.CTkLabel(preset_frame, textvariable=self.preset_state, text_color="#9FB3C8").pack(
             anchor="w", pady=4
         )
+        calibrate_btn = ctk.CTkButton(preset_frame, text="Calibrate flat-field (blank slide)", command=self._calibrate_flat_field)
+        styles.style_button(calibrate_btn, primary=False)
+        calibrate_btn.pack(anchor="w", pady=4)
 
         stats_frame = ctk.CTkFrame(side_panel, fg_color="transparent")
         stats_frame.pack(fill="x", padx=10, pady=10)
-        ctk.CTkLabel(stats_frame, text="Camera FPS: ~30 (placeholder)").pack(anchor="w")
-        ctk.CTkLabel(stats_frame, text="Storage: OK").pack(anchor="w")
+        self.camera_fps_label = ctk.CTkLabel(stats_frame, text="Camera FPS: —")
+        self.processing_fps_label = ctk.CTkLabel(stats_frame, text="Processed FPS: —")
+        self.latency_label = ctk.CTkLabel(stats_frame, text="Inference: —")
+        self.queue_label = ctk.CTkLabel(stats_frame, text="Queues: —")
+        self.shed_label = ctk.CTkLabel(stats_frame, text="Shed frames: 0")
+        self.storage_label = ctk.CTkLabel(stats_frame, text="Storage: OK")
+        for widget in [self.camera_fps_label, self.processing_fps_label, self.latency_label, self.queue_label, self.shed_label, self.storage_label]:
+            widget.pack(anchor="w")
 
         quality_frame = ctk.CTkFrame(side_panel, fg_color="transparent")
         quality_frame.pack(fill="x", padx=10, pady=6)
         ctk.CTkLabel(quality_frame, text="Capture Quality", font=("Calibri", 13, "bold")).pack(anchor="w")
-        self.exposure_label = ctk.CTkLabel(quality_frame, text="Exposure: — ms")  # TODO wire to camera stats
-        self.gain_label = ctk.CTkLabel(quality_frame, text="Gain: —")  # TODO wire to camera stats
-        self.sharpness_label = ctk.CTkLabel(quality_frame, text="Sharpness: —")  # TODO compute focus metric
-        self.brightness_label = ctk.CTkLabel(quality_frame, text="Brightness: [■■■■■■■■■■]")  # TODO real indicator
-        for widget in [self.exposure_label, self.gain_label, self.sharpness_label, self.brightness_label]:
+        self.exposure_label = ctk.CTkLabel(quality_frame, text="Exposure: — ms")
+        self.gain_label = ctk.CTkLabel(quality_frame, text="Gain: —")
+        self.sharpness_label = ctk.CTkLabel(quality_frame, text="Sharpness: —")
+        self.brightness_label = ctk.CTkLabel(quality_frame, text="Brightness: [□□□□□□□□□□]")
+        self.noise_label = ctk.CTkLabel(quality_frame, text="Noise: —")
+        for widget in [self.exposure_label, self.gain_label, self.sharpness_label, self.brightness_label, self.noise_label]:
             widget.pack(anchor="w")
 
+    def _poll_preview(self) -> None:
+        """Show the newest streamed frame and refresh quality metrics at preview rate."""
+        camera = self.pipeline_manager.camera
+        try:
+            if camera.streaming:
+                frame = camera.latest_frame(newer_than=self._last_preview_sequence)
+                if frame is not None:
+                    self._last_preview_sequence = frame.sequence
+                    preview = image_utils.resize_for_preview(frame.to_pil().copy())
+                    self.preview_image = image_utils.pil_to_imagetk(preview)
+                    self.preview_label.configure(image=self.preview_image, text="")
+                    self._update_quality(camera.quality_metrics(frame), camera.sensor_metadata())
+        except Exception:
+            self.logger.exception("Preview update failed")
+        self.after(PREVIEW_INTERVAL_MS, self._poll_preview)
+
+    def _poll_metrics(self) -> None:
+        """Refresh frame rates, inference latency and queue depths once a second."""
+        try:
+            snapshot = self.pipeline_manager.pipeline_metrics()
+            fps = snapshot["fps"]
+            self.camera_fps_label.configure(text=f"Camera FPS: {fps.get('camera', 0.0):.1f}")
+            self.processing_fps_label.configure(text=f"Processed FPS: {fps.get('processed', 0.0):.1f}")
+            inference = snapshot["stages"].get("inference", {})
+            if inference.get("count"):
+                self.latency_label.configure(
+                    text=f"Inference: p50 {inference['p50_ms']:.0f} ms, p95 {inference['p95_ms']:.0f} ms"
+                )
+            shed = snapshot["frames"].get("shed", 0)
+            self.shed_label.configure(text=f"Shed frames: {shed} ({fps.get('shed', 0.0):.1f}/s)" if shed else "Shed frames: 0")
+            queues = snapshot["queues"]
+            storage = queues.pop("storage", 0)
+            self.storage_label.configure(text=f"Storage: {storage} pending" if storage else "Storage: OK")
+            busy = {name: depth for name, depth in queues.items() if depth}
+            self.queue_label.configure(
+                text="Queues: " + (", ".join(f"{name}={depth}" for name, depth in sorted(busy.items())) or "idle")
+            )
+        except Exception:
+            self.logger.exception("Metrics update failed")
+        self.after(METRICS_INTERVAL_MS, self._poll_metrics)
+
+    def _update_quality(self, metrics, metadata: dict) -> None:
+        """Render focus/exposure metrics in the capture quality panel."""
+        if metrics is None:
+            return
+        exposure_us = metadata.get("ExposureTime")
+        gain = metadata.get("AnalogueGain")
+        self.exposure_label.configure(text=f"Exposure: {exposure_us / 1000:.1f} ms" if exposure_us else "Exposure: — ms")
+        self.gain_label.configure(text=f"Gain: {gain:.2f}" if gain else "Gain: —")
+        min_sharpness = self.pipeline_manager.settings.get("quality", {}).get("min_sharpness", 50.0)
+        focus = "OK" if metrics.sharpness >= min_sharpness else "BLURRY"
+        self.sharpness_label.configure(text=f"Sharpness: {metrics.sharpness:.0f} ({focus})")
+        filled = int(round(metrics.brightness / 255 * 10))
+        clipping = " clipped" if not metrics.exposure_ok else ""
+        self.brightness_label.configure(text=f"Brightness: [{'■' * filled}{'□' * (10 - filled)}]{clipping}")
+        self.noise_label.configure(text=f"Noise: σ≈{metrics.noise:.1f}")
+
     def capture_image(self) -> None:
         """Capture via pipeline manager and update preview."""
         result = self.pipeline_manager.capture_and_process()
-        image = result.get("image")
-        if image:
-            preview = image_utils.resize_for_preview(image.copy())
+        frame = result.get("image")
+        if frame is not None:
+            preview = image_utils.resize_for_preview(frame.to_pil().copy())
             self.preview_image = image_utils.pil_to_imagetk(preview)
             self.preview_label.configure(image=self.preview_image, text="")
+            self._update_quality(self.pipeline_manager.camera.quality_metrics(frame), self.pipeline_manager.camera.sensor_metadata())
             self._update_overlay()
+            if result.get("rejected"):
+                self._show_toast(f"Frame rejected ({result['rejected']})")
+                if self.host:
+                    self.host.set_status(f"Frame rejected: {result['rejected']}")
+                return
             self._show_toast("Captured sample")
             if self.host:
+                self.host.show_results(result)
                 self.host.set_status("Captured frame")
         else:
             self.preview_label.configure(text="Capture failed")
@@ -166,11 +249,29 @@ class CaptureScreen(ctk.CTkFrame):
                 self.host.set_status("Captured frame and saved sample")
                 self.host.set_sample_context(f"Sample: {metadata.get('location') or 'N/A'} @ {metadata.get('magnification') or '—'}")
 
+    def _new_session(self) -> None:
+        """Reset the running per-species statistics for a new sample."""
+        self.pipeline_manager.start_session()
+        if self.host:
+            self.host.show_results({})
+            self.host.set_status("Started new sample session")
+
     def _set_preset(self, preset: str) -> None:
-        """Update preset state; TODO: wire to camera settings."""
+        """Update preset state and switch the pipeline's flat-field model."""
         self.preset_state.set(f"Preset: {preset}")
+        self.pipeline_manager.set_preset(preset)
         # TODO: apply actual camera parameters for presets
 
+    def _calibrate_flat_field(self) -> None:
+        """Build the flat-field model for the current preset from blank frames."""
+        preset = self.pipeline_manager.preset
+        if self.pipeline_manager.calibrate_flat_field(preset):
+            self._show_toast(f"Flat-field stored for {preset}")
+            if self.host:
+                self.host.set_status(f"Flat-field calibrated for preset {preset}")
+        elif self.host:
+            self.host.set_status("Flat-field calibration failed")
+
     def _update_overlay(self) -> None:
         """Update overlay label with context."""
         text = f"{self.magnification.get() or '—'} | {self.location.get() or '—'} | {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}"
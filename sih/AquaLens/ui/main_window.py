@@ -161,6 +161,10 @@ class MainWindow(ctk.CTk):
         """Update sample context label."""
         self.sample_context.set(text)
 
+    def show_results(self, result: Dict) -> None:
+        """Push a pipeline result to the results screen."""
+        self.frames["results"].show_results(result)
+
     def set_status(self, message: str) -> None:
         """Update transient status message in the bottom bar."""
         self.status_message.set(message)
@@ -87,22 +87,27 @@ class ResultsScreen(ctk.CTkFrame):
             styles.style_button(btn, primary=False)
             btn.pack(fill="x", pady=3)
 
-    def update_summary(self, results: dict) -> None:
-        """Update summary card with detection metrics."""
-        detections = results.get("detections", []) or []
-        counts = results.get("counts", {}) or {}
-        total = len(detections)
-        species_detected = len(counts.keys())
-        dominant = max(counts, key=counts.get) if counts else "N/A"
-        confidences = [d.get("confidence") for d in detections if d.get("confidence") is not None]
-        mean_conf = sum(confidences) / len(confidences) if confidences else 0
-        qc_flag = "OK" if total > 0 and mean_conf >= 0.5 else "Review"
+    def show_results(self, result: dict) -> None:
+        """Refresh every panel from a pipeline result's running session summary."""
+        summary = result.get("summary") or {}
+        self.update_summary(summary)
+        counts = summary.get("counts", {})
+        confidences = {name: stats["mean_confidence"] for name, stats in summary.get("species", {}).items()}
+        self.update_species_table(counts, confidences)
+        self.update_distribution_bars(counts)
+
+    def update_summary(self, summary: dict) -> None:
+        """Update summary card from a SpeciesAggregator summary."""
+        total = summary.get("total", 0)
+        counts = summary.get("counts", {}) or {}
+        mean_conf = summary.get("mean_confidence")
+        qc_flag = "OK" if total > 0 and mean_conf is not None and mean_conf >= 0.5 else "Review"
 
         data = {
             "Total detections": total,
-            "Species detected": species_detected,
-            "Dominant species": dominant,
-            "Mean confidence": f"{mean_conf:.2f}" if confidences else "N/A",
+            "Species detected": len(counts),
+            "Dominant species": summary.get("dominant") or "N/A",
+            "Mean confidence": f"{mean_conf:.2f}" if mean_conf is not None else "N/A",
             "QC flag": qc_flag,
         }
         for key, label in self.summary_labels.items():